@@ -17,8 +17,25 @@ class BehaviorMonitorPlugin(PluginInterface):
         self.config = config
         self.start_time = time.time()
         self.process = psutil.Process()
+        # Process metrics shared by the validators, refreshed at most once per
+        # sample interval so tight monitoring loops don't hammer /proc
+        self.sample_interval = config.get('sample_interval_s', 0.2)
+        self._sample: Dict[str, float] = {}
+        self._sample_time = float('-inf')
         return True
 
+    def _sample_process(self) -> Dict[str, float]:
+        """Read process metrics in a single oneshot() pass, cached briefly"""
+        now = time.monotonic()
+        if now - self._sample_time >= self.sample_interval:
+            with self.process.oneshot():
+                self._sample = {
+                    'memory_percent': self.process.memory_percent(),
+                    'cpu_percent': self.process.cpu_percent()
+                }
+            self._sample_time = now
+        return self._sample
+
     def get_safety_properties(self) -> List[SafetyProperty]:
         """Define safety properties for runtime behavior"""
         return [
@@ -55,7 +72,7 @@ class BehaviorMonitorPlugin(PluginInterface):
         """Define behavior validators for runtime monitoring"""
         def validate_memory_usage(context: Dict[str, Any]) -> bool:
             """Validate memory usage is within limits"""
-            memory_percent = self.process.memory_percent()
+            memory_percent = self._sample_process()['memory_percent']
             memory_limit = self.config.get('memory_limit_percent', 80)
             
             context['memory_percent'] = memory_percent
@@ -63,7 +80,7 @@ class BehaviorMonitorPlugin(PluginInterface):
 
         def validate_cpu_usage(context: Dict[str, Any]) -> bool:
             """Validate CPU usage is within limits"""
-            cpu_percent = self.process.cpu_percent()
+            cpu_percent = self._sample_process()['cpu_percent']
             cpu_limit = self.config.get('cpu_limit_percent', 90)
             
             context['cpu_percent'] = cpu_percent
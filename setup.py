@@ -4,6 +4,7 @@ setup(
     name="sacp",
     version="0.1.0",
     packages=find_packages(),
+    python_requires=">=3.10",
     install_requires=[
         "psutil",
     ],
@@ -4,19 +4,46 @@ Implements code analysis, pattern recognition, and security scanning.
 """
 
 import ast
-from typing import List, Dict, Any, Optional, Set, Tuple
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import time
+from typing import List, Dict, Any, Optional, Set, Tuple, Union, AnyStr, NamedTuple
 from dataclasses import dataclass
 from pathlib import Path
 import re
 from enum import Enum, auto
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import StringIO
+from itertools import repeat
+from operator import attrgetter
 import logging
-import astroid
-from pylint.lint import Run
-from pylint.reporters import JSONReporter
-import bandit
-from bandit.core import manager, config
-import safety.util
-import safety.safety
+
+try:
+    import re2  # google-re2: linear-time DFA matching, optional
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False  # rejected patterns fall back to re quietly
+except ImportError:
+    re2 = None
+    _RE2_OPTIONS = None
+
+try:
+    import numpy as np  # vectorized newline indexing for large files, optional
+except ImportError:
+    np = None
+
+# Files at least this large get their newlines indexed with NumPy when available
+_NUMPY_NEWLINE_THRESHOLD = 64 * 1024
+# Files with at least this many matches get their line numbers in one NumPy search
+_NUMPY_SEARCH_THRESHOLD = 64
+
+# Files at least this large are memory-mapped rather than read onto the heap
+_MMAP_THRESHOLD = 1024 * 1024
 
 
 class AnalysisType(Enum):
@@ -35,7 +62,7 @@ class Severity(Enum):
     CRITICAL = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class AnalysisResult:
     """Result of a static analysis check"""
     analysis_type: AnalysisType
@@ -48,264 +75,580 @@ class AnalysisResult:
     metadata: Optional[Dict[str, Any]] = None
 
 
+class PatternSpec(NamedTuple):
+    """What a pattern reports for each match"""
+    name: str
+    severity: Severity
+    message: str
+
+
+def _newline_offsets(content: Union[str, bytes, mmap.mmap]) -> List[int]:
+    """Get the sorted offsets of every newline in content"""
+    if isinstance(content, str):
+        newline = '\n'
+    else:
+        if np is not None and len(content) >= _NUMPY_NEWLINE_THRESHOLD:
+            # One vectorized compare over the buffer instead of a find() per line
+            return np.flatnonzero(np.frombuffer(content, dtype=np.uint8) == 0x0A).tolist()
+        newline = b'\n'
+    offsets = []
+    index = content.find(newline)
+    while index != -1:
+        offsets.append(index)
+        index = content.find(newline, index + 1)
+    return offsets
+
+
+def _line_numbers(newlines: List[int], offsets: List[int]) -> List[int]:
+    """Map content offsets to 1-based line numbers"""
+    if np is not None and len(offsets) >= _NUMPY_SEARCH_THRESHOLD:
+        # One vectorized binary search for every offset at once
+        return (np.searchsorted(newlines, offsets) + 1).tolist()
+    bisect_left = bisect.bisect_left
+    return [bisect_left(newlines, offset) + 1 for offset in offsets]
+
+
+def _column(newlines: List[int], offset: int, line_no: int) -> int:
+    """Get the 0-based column of a content offset on its 1-based line"""
+    return offset - (newlines[line_no - 2] + 1 if line_no > 1 else 0)
+
+
+def _compile_scanner(pattern: AnyStr):
+    """Compile a scan pattern with RE2 when available, else the re module"""
+    if re2 is not None:
+        try:
+            return re2.compile(pattern, options=_RE2_OPTIONS)
+        except Exception as e:
+            logging.debug(f"RE2 rejected pattern, using re: {e}")
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=512)
+def _compile_rule(pattern: str):
+    """Compile a custom rule pattern once, however many files it is applied to.
+
+    User-supplied patterns go to RE2 when available, whose linear-time
+    matching cannot be stalled by catastrophic backtracking; patterns it
+    rejects (backreferences, lookaround) fall back to re.
+    """
+    if re2 is not None:
+        try:
+            return re2.compile(pattern, options=_RE2_OPTIONS)
+        except Exception:
+            logging.warning(f"Custom rule pattern needs backtracking re and may be slow: {pattern}")
+    return re.compile(pattern)
+
+
+def _line_text(content: AnyStr, newlines: List[int], line_no: int) -> AnyStr:
+    """Slice a single 1-based line out of content using its newline offsets"""
+    start = newlines[line_no - 2] + 1 if line_no > 1 else 0
+    end = newlines[line_no - 1] if line_no <= len(newlines) else len(content)
+    return content[start:end]
+
+
 class PatternAnalyzer:
     """Analyzes code for specific patterns and anti-patterns"""
 
-    def __init__(self):
+    def __init__(self, max_file_size: int = 10 * 1024 * 1024):
+        self.max_file_size = max_file_size
+        # 'literals' lists substrings at least one of which must appear for the
+        # pattern to match; files without any of them skip the regex entirely.
+        # Patterns and literals are encoded to bytes when files are scanned.
         self.patterns: Dict[str, Dict] = {
             'hardcoded_secrets': {
-                'pattern': r'(?i)(password|secret|key|token)\s*=\s*["\'][^"\']+["\']',
+                'pattern': r'(password|secret|key|token)\s*=\s*["\'][^"\']+["\']',
+                'flags': re.IGNORECASE,
+                'literals': ('password', 'secret', 'key', 'token'),
                 'severity': Severity.CRITICAL,
                 'message': 'Hardcoded secret detected'
             },
             'sql_injection': {
-                'pattern': r'(?i)execute\s*\(\s*["\'][^"\']*\%s[^"\']*["\']',
+                'pattern': r'execute\s*\(\s*["\'][^"\']*\%s[^"\']*["\']',
+                'flags': re.IGNORECASE,
+                'literals': ('execute',),
                 'severity': Severity.CRITICAL,
                 'message': 'Potential SQL injection vulnerability'
             },
             'debug_code': {
-                'pattern': r'(?i)(print|console\.log)\s*\(',
+                'pattern': r'(print|console\.log)\s*\(',
+                'flags': re.IGNORECASE,
+                'literals': ('print', 'console.log'),
                 'severity': Severity.WARNING,
                 'message': 'Debug code detected'
             },
             'unsafe_pickle': {
                 'pattern': r'pickle\.loads?\(',
+                'flags': 0,
+                'literals': ('pickle.load',),
                 'severity': Severity.ERROR,
                 'message': 'Unsafe pickle usage detected'
             }
         }
 
-    def analyze_file(self, file_path: str) -> List[AnalysisResult]:
-        """Analyze a file for pattern matches"""
+        # Compiled scanners keyed by pattern name and whether they run over
+        # lowercased content, built on first use
+        self._scanners: Dict[Tuple[str, bool], Any] = {}
+        # Case-insensitive searches for the literals of each pattern, used on
+        # mapped files that are never lowercased
+        self._literal_finders: Dict[str, Any] = {}
+        # Per-match attributes of each pattern, built on first hit
+        self._specs: Dict[str, PatternSpec] = {}
+
+    def _spec_for(self, pattern_name: str) -> PatternSpec:
+        """Get the reporting attributes of a pattern as a PatternSpec"""
+        spec = self._specs.get(pattern_name)
+        if spec is None:
+            pattern_info = self.patterns[pattern_name]
+            spec = PatternSpec(pattern_name, pattern_info['severity'], pattern_info['message'])
+            self._specs[pattern_name] = spec
+        return spec
+
+    def _scanner_for(self, pattern_name: str, lowered: bool = False):
+        """Get the compiled scanner of a pattern.
+
+        With lowered, a case-insensitive pattern that _scans_lowered is
+        compiled to match lowercased content case-sensitively. The scanner
+        works on raw bytes, so files never need a full decode.
+        """
+        key = (pattern_name, lowered)
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            pattern_info = self.patterns[pattern_name]
+            pattern = pattern_info['pattern']
+            if pattern_info['flags'] & re.IGNORECASE and not lowered:
+                pattern = f'(?i:{pattern})'
+            scanner = _compile_scanner(pattern.encode())
+            self._scanners[key] = scanner
+        return scanner
+
+    def _literal_finder(self, pattern_name: str):
+        """Get a case-insensitive search for any of a pattern's literals"""
+        finder = self._literal_finders.get(pattern_name)
+        if finder is None:
+            literals = self.patterns[pattern_name]['literals']
+            alternatives = b'|'.join(re.escape(literal.encode()) for literal in literals)
+            finder = _compile_scanner(b'(?i:' + alternatives + b')')
+            self._literal_finders[pattern_name] = finder
+        return finder
+
+    @staticmethod
+    def _scans_lowered(pattern_info: Dict) -> bool:
+        """Check whether a case-insensitive pattern can match lowercased content.
+
+        A pattern with no uppercase characters (literals or escapes such as
+        \\S) matches the lowercased bytes exactly as it would match the
+        original with IGNORECASE, and byte offsets are unchanged by lower().
+        """
+        pattern = pattern_info['pattern']
+        return bool(pattern_info['flags'] & re.IGNORECASE) and pattern == pattern.lower()
+
+    def _candidate_patterns(self, content: Union[bytes, mmap.mmap]) -> Tuple[Tuple[str, ...], Optional[bytes]]:
+        """Get the patterns whose required literals occur in content.
+
+        Also returns the lowercased content when it had to be computed, so
+        the scan can reuse it. Mapped files are never lowercased, as that
+        would copy them onto the heap; their case-insensitive literals are
+        searched for in the mapping instead.
+        """
+        lowered = None
+        candidates = []
+        for pattern_name, pattern_info in self.patterns.items():
+            if pattern_info['flags'] & re.IGNORECASE:
+                if isinstance(content, mmap.mmap):
+                    if self._literal_finder(pattern_name).search(content):
+                        candidates.append(pattern_name)
+                    continue
+                if lowered is None:
+                    lowered = content.lower()
+                haystack = lowered
+            else:
+                haystack = content
+            # find() rather than `in`, which tests single bytes on an mmap
+            if any(haystack.find(literal.encode()) != -1 for literal in pattern_info['literals']):
+                candidates.append(pattern_name)
+        return tuple(candidates), lowered
+
+    def analyze_file(self, file_path: str, content: Optional[bytes] = None) -> List[AnalysisResult]:
+        """Analyze a file for pattern matches.
+
+        content may carry the file's bytes when the caller has already read
+        them, so the file is not read a second time.
+        """
         results = []
         
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-                lines = content.split('\n')
-                
-                for pattern_name, pattern_info in self.patterns.items():
-                    matches = re.finditer(pattern_info['pattern'], content)
-                    for match in matches:
-                        line_no = content.count('\n', 0, match.start()) + 1
-                        results.append(AnalysisResult(
-                            analysis_type=AnalysisType.PATTERN_MATCH,
-                            severity=pattern_info['severity'],
-                            file_path=file_path,
-                            line_number=line_no,
-                            message=pattern_info['message'],
-                            code=lines[line_no - 1].strip(),
-                            metadata={'pattern_name': pattern_name}
-                        ))
+            size = len(content) if content is not None else os.path.getsize(file_path)
+            if size > self.max_file_size:
+                logging.warning(f"Skipping pattern analysis of large file: {file_path}")
+                return results
+            
+            # Scan raw bytes; only matched lines are ever decoded
+            if content is not None:
+                results = self._scan(file_path, content)
+            elif size >= _MMAP_THRESHOLD:
+                # Map large files so the kernel's page cache backs the scan
+                with open(file_path, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    results = self._scan(file_path, mapped)
+            else:
+                with open(file_path, 'rb') as f:
+                    results = self._scan(file_path, f.read())
         except Exception as e:
             logging.error(f"Error analyzing {file_path}: {str(e)}")
         
         return results
 
+    def _scan(self, file_path: str, content: Union[bytes, mmap.mmap]) -> List[AnalysisResult]:
+        """Scan a file's bytes, or a mapping of them, for pattern matches"""
+        results = []
+        
+        # Skip binary content
+        if content.find(b'\0') != -1:
+            logging.warning(f"Skipping pattern analysis of binary file: {file_path}")
+            return results
+        
+        pattern_names, lowered = self._candidate_patterns(content)
+        if not pattern_names:
+            return results
+        
+        # Scan per pattern: one alternation would report only one pattern per
+        # position, dropping hits of patterns that overlap. When lowercased
+        # bytes are at hand, case-insensitive patterns run case-sensitively
+        # over them, so the matcher never folds case character by character
+        matches = []
+        for pattern_name in pattern_names:
+            use_lowered = lowered is not None and self._scans_lowered(self.patterns[pattern_name])
+            scanner = self._scanner_for(pattern_name, use_lowered)
+            matches.extend(
+                (pattern_name, match)
+                for match in scanner.finditer(lowered if use_lowered else content)
+            )
+        if not matches:
+            return results
+        
+        # Index newlines only once a file has hits, then number every match
+        newlines = _newline_offsets(content)
+        line_numbers = _line_numbers(newlines, [match.start() for _, match in matches])
+        specs = self._specs
+        
+        for (pattern_name, match), line_no in zip(matches, line_numbers):
+            spec = specs.get(pattern_name) or self._spec_for(pattern_name)
+            results.append(AnalysisResult(
+                analysis_type=AnalysisType.PATTERN_MATCH,
+                severity=spec.severity,
+                file_path=file_path,
+                line_number=line_no,
+                message=spec.message,
+                code=_line_text(content, newlines, line_no).decode('utf-8', errors='replace').strip(),
+                metadata={
+                    'pattern_name': spec.name,
+                    'column': _column(newlines, match.start(), line_no)
+                }
+            ))
+        
+        return results
+
 
 class SecurityAnalyzer:
     """Analyzes code for security issues using Bandit and custom rules"""
+
+    SEVERITY_MAP = {
+        'LOW': Severity.INFO,
+        'MEDIUM': Severity.WARNING,
+        'HIGH': Severity.ERROR
+    }
     
     def __init__(self):
         self.pattern_analyzer = PatternAnalyzer()
+        self._bandit_config = None
+
+    @property
+    def bandit_config(self):
+        """Bandit configuration, loaded on first use and shared by every run"""
+        if self._bandit_config is None:
+            from bandit.core import config
+            self._bandit_config = config.BanditConfig()
+        return self._bandit_config
 
     def analyze_file(self, file_path: str, rules: Optional[Dict] = None) -> List[AnalysisResult]:
         """Analyze a single file for security issues"""
+        return self.analyze_files([file_path], rules)
+
+    def analyze_files(
+        self,
+        file_paths: List[str],
+        rules: Optional[Dict] = None,
+        sources: Optional[Dict[str, Optional[bytes]]] = None
+    ) -> List[AnalysisResult]:
+        """Analyze a batch of files for security issues with a single Bandit run.
+
+        sources optionally maps paths to bytes already read by the caller,
+        which the custom rules then scan instead of rereading the files.
+        """
+        results = self._run_bandit(file_paths)
+        
+        if rules:
+            sources = sources or {}
+            for file_path in file_paths:
+                results.extend(self._apply_rules(file_path, rules, sources.get(file_path)))
+            
+        return results
+
+    def _run_bandit(self, file_paths: List[str]) -> List[AnalysisResult]:
+        """Run Bandit once over all files and convert its issues"""
+        from bandit.core import manager
+
         results = []
         
-        # First run Bandit analysis
         try:
-            import bandit
-            from bandit.core import manager
-            from bandit.core import config
-            from bandit.core import metrics
-            from bandit.core import issue
-
-            # Initialize Bandit manager with basic config
-            b_mgr = manager.BanditManager(
-                config.BanditConfig(),
-                'file'
-            )
+            b_mgr = manager.BanditManager(self.bandit_config, 'file')
 
             # Run analysis
-            b_mgr.discover_files([file_path])
+            b_mgr.discover_files(file_paths)
             b_mgr.run_tests()
 
-            # Convert Bandit issues to our format
+            # Convert Bandit issues to our format; Bandit severities are
+            # already upper-case keys, so look them up directly
+            severity_of = self.SEVERITY_MAP.get
             for issue in b_mgr.get_issue_list():
-                severity = self._convert_severity(issue.severity)
+                severity = severity_of(issue.severity, Severity.WARNING)
                 results.append(AnalysisResult(
                     analysis_type=AnalysisType.SECURITY_SCAN,
                     severity=severity,
-                    file_path=file_path,
+                    file_path=issue.fname,
                     line_number=issue.lineno,
                     message=f"{issue.test_id}: {issue.text}",
                     metadata={
                         'test_id': issue.test_id,
                         'confidence': issue.confidence,
-                        'cwe': getattr(issue, 'cwe', None)
+                        # The CWE number, so results stay plain JSON data
+                        'cwe': getattr(getattr(issue, 'cwe', None), 'id', None),
+                        'column': getattr(issue, 'col_offset', None)
                     }
                 ))
 
         except Exception as e:
-            logging.error(f"Error running security analysis on {file_path}: {str(e)}")
+            logging.error(f"Error running security analysis on {', '.join(file_paths)}: {str(e)}")
             
-        # Then run custom rule analysis if provided
+        return results
+
+    def _apply_rules(
+        self,
+        file_path: str,
+        rules: Optional[Dict],
+        source: Optional[bytes] = None
+    ) -> List[AnalysisResult]:
+        """Apply custom pattern rules to a file.
+
+        source may carry the file's bytes when the caller has already read
+        them, so the file is not read a second time.
+        """
+        results = []
+        
         if rules:
             try:
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                    lines = content.split('\n')
-                    
-                    for rule_name, rule_info in rules.items():
-                        pattern = rule_info.get('pattern')
-                        if pattern:
-                            matches = re.finditer(pattern, content)
-                            for match in matches:
-                                line_no = content.count('\n', 0, match.start()) + 1
-                                results.append(AnalysisResult(
-                                    analysis_type=AnalysisType.PATTERN_MATCH,
-                                    severity=Severity.ERROR,  # Custom rules are treated as errors
-                                    file_path=file_path,
-                                    line_number=line_no,
-                                    message=rule_info.get('description', f'Violated rule: {rule_name}'),
-                                    code=lines[line_no - 1].strip(),
-                                    metadata={'rule_name': rule_name}
-                                ))
+                if source is None:
+                    with open(file_path, 'r') as f:
+                        content = f.read()
+                else:
+                    content = source.decode('utf-8', errors='replace')
+                
+                # A rule may list 'literals', substrings one of which must
+                # occur for it to match, so absent rules skip the regex
+                active_rules = [
+                    (rule_name, rule_info) for rule_name, rule_info in rules.items()
+                    if rule_info.get('pattern') and (
+                        not rule_info.get('literals')
+                        or any(literal in content for literal in rule_info['literals'])
+                    )
+                ]
+                if not active_rules:
+                    return results
+                
+                # Scan per rule: one alternation would report only one rule
+                # per position, dropping hits of rules that overlap
+                matches = [
+                    ((rule_name, rule_info), match)
+                    for rule_name, rule_info in active_rules
+                    for match in _compile_rule(rule_info['pattern']).finditer(content)
+                ]
+                if not matches:
+                    return results
+                
+                # Index newlines only once a file has hits, then number every match
+                newlines = _newline_offsets(content)
+                line_numbers = _line_numbers(newlines, [match.start() for _, match in matches])
+                
+                for ((rule_name, rule_info), match), line_no in zip(matches, line_numbers):
+                    results.append(AnalysisResult(
+                        analysis_type=AnalysisType.PATTERN_MATCH,
+                        severity=Severity.ERROR,  # Custom rules are treated as errors
+                        file_path=file_path,
+                        line_number=line_no,
+                        message=rule_info.get('description', f'Violated rule: {rule_name}'),
+                        code=_line_text(content, newlines, line_no).strip(),
+                        metadata={
+                            'rule_name': rule_name,
+                            'column': _column(newlines, match.start(), line_no)
+                        }
+                    ))
             except Exception as e:
                 logging.error(f"Error applying custom rules to {file_path}: {str(e)}")
             
         return results
 
-    def _convert_severity(self, bandit_severity: str) -> Severity:
-        """Convert Bandit severity to our severity level"""
-        severity_map = {
-            'LOW': Severity.INFO,
-            'MEDIUM': Severity.WARNING,
-            'HIGH': Severity.ERROR
-        }
-        return severity_map.get(bandit_severity, Severity.WARNING)
+
+@lru_cache(maxsize=None)
+def _result_reporter_class():
+    """Build the Pylint reporter class on first use, so pylint loads lazily"""
+    from pylint.reporters import BaseReporter
+
+    class _ResultReporter(BaseReporter):
+        """Pylint reporter that turns each message straight into an AnalysisResult"""
+
+        name = 'sacp'
+
+        def __init__(
+            self,
+            results: List[AnalysisResult],
+            paths_by_abspath: Dict[str, str],
+            severity_map: Dict[str, Severity]
+        ):
+            # Nothing is displayed, but keep any stray report output off stdout
+            super().__init__(StringIO())
+            self.results = results
+            self.paths_by_abspath = paths_by_abspath
+            # Pylint categories are always lower-case, so no normalising is needed
+            self.severity_of = severity_map.get
+
+        def handle_message(self, msg) -> None:
+            """Convert a Pylint message as soon as it is emitted"""
+            self.results.append(AnalysisResult(
+                analysis_type=AnalysisType.STYLE_CHECK,
+                severity=self.severity_of(msg.category, Severity.WARNING),
+                file_path=self.paths_by_abspath.get(msg.abspath, msg.path),
+                line_number=msg.line,
+                message=msg.msg,
+                code=msg.msg_id,
+                metadata={'symbol': msg.symbol, 'column': msg.column}
+            ))
+
+        def _display(self, layout) -> None:
+            """Reports are disabled; nothing to display"""
+
+    return _ResultReporter
 
 
 class StyleAnalyzer:
     """Analyzes code style using Pylint"""
+
+    SEVERITY_MAP = {
+        'convention': Severity.INFO,
+        'refactor': Severity.INFO,
+        'warning': Severity.WARNING,
+        'error': Severity.ERROR,
+        'fatal': Severity.CRITICAL
+    }
     
     def analyze_file(self, file_path: str) -> List[AnalysisResult]:
         """Analyze a file for style issues"""
-        import os
-        import sys
-        import json
-        import logging
-        from io import StringIO
+        return self.analyze_files([file_path])
+
+    def analyze_files(self, file_paths: List[str]) -> List[AnalysisResult]:
+        """Analyze a batch of files for style issues with a single Pylint run"""
         from pylint.lint import Run
-        from pylint.reporters.json_reporter import JSONReporter
 
         results = []
         
         try:
-            # Check if file exists and is readable
-            if not os.path.isfile(file_path):
-                logging.error(f"File not found: {file_path}")
-                return results
+            # Check files exist and are readable
+            readable = []
+            for file_path in file_paths:
+                if not os.path.isfile(file_path):
+                    logging.error(f"File not found: {file_path}")
+                elif not os.access(file_path, os.R_OK):
+                    logging.error(f"File not readable: {file_path}")
+                else:
+                    readable.append(file_path)
             
-            if not os.access(file_path, os.R_OK):
-                logging.error(f"File not readable: {file_path}")
+            if not readable:
                 return results
             
-            # Capture stdout to prevent pylint from printing to console
-            output_buffer = StringIO()
-            old_stdout = sys.stdout
-            sys.stdout = output_buffer
+            # Pylint reports its own spelling of each path; map back to ours
+            paths_by_abspath = {os.path.abspath(path): path for path in readable}
             
-            try:
-                # Run pylint with JSON reporter and specific options
-                Run([
-                    str(file_path),
-                    '--output-format=json',
-                    '--disable=all',  # Disable all checks first
-                    '--enable=C,R,W,E,F',  # Enable all categories
-                    '--msg-template={msg_id}:{line:3d},{column}: {obj}: {msg}'
-                ], reporter=JSONReporter(), exit=False)
-                
-                # Get the output from StringIO
-                output = output_buffer.getvalue()
-                
-                try:
-                    # Parse JSON output directly from the string
-                    if output.strip():
-                        messages = json.loads(output)
-                        for message in messages:
-                            results.append(AnalysisResult(
-                                analysis_type=AnalysisType.STYLE_CHECK,
-                                severity=self._convert_severity(message.get('type', 'warning')),
-                                file_path=file_path,
-                                line_number=message.get('line', 0),
-                                message=message.get('message', ''),
-                                code=message.get('message-id', ''),
-                                metadata={'symbol': message.get('symbol', '')}
-                            ))
-                except json.JSONDecodeError as je:
-                    logging.error(f"Error parsing pylint output for {file_path}: {je}")
-                    logging.debug(f"Raw output: {output}")
-                
-            finally:
-                # Restore stdout
-                sys.stdout = old_stdout
+            # Run pylint once over every file; the reporter appends results
+            # directly, so there is no JSON to serialize and parse back
+            Run([
+                *readable,
+                '--disable=all',  # Disable all checks first
+                '--enable=C,R,W,E,F',  # Enable all categories
+                '--reports=n',
+                '--score=n'
+            ], reporter=_result_reporter_class()(results, paths_by_abspath, self.SEVERITY_MAP), exit=False)
                 
         except Exception as e:
-            logging.error(f"Error style checking {file_path}: {str(e)}")
+            logging.error(f"Error style checking {', '.join(file_paths)}: {str(e)}")
             import traceback
             logging.debug(f"Traceback: {traceback.format_exc()}")
         
         return results
 
-    def _convert_severity(self, pylint_category: str) -> Severity:
-        """Convert Pylint category to our severity level"""
-        mapping = {
-            'convention': Severity.INFO,
-            'refactor': Severity.INFO,
-            'warning': Severity.WARNING,
-            'error': Severity.ERROR,
-            'fatal': Severity.CRITICAL
-        }
-        return mapping.get(pylint_category.lower(), Severity.WARNING)
+
+# How long Safety may reuse its on-disk copy of the vulnerability database,
+# so checking several requirements files fetches it only once
+_SAFETY_CACHE_SECONDS = 24 * 60 * 60
 
 
 class DependencyAnalyzer:
     """Analyzes project dependencies for security issues"""
+
+    SEVERITY_MAP = {
+        'low': Severity.INFO,
+        'medium': Severity.WARNING,
+        'high': Severity.ERROR,
+        'critical': Severity.CRITICAL
+    }
     
     def analyze_requirements(self, requirements_file: str) -> List[AnalysisResult]:
         """Analyze requirements.txt for known vulnerabilities"""
         results = []
         try:
+            from safety import safety
+            from safety.util import read_requirements
+
             # Read and parse requirements file
             with open(requirements_file, 'r') as f:
-                requirements = [line.strip() for line in f.readlines() 
-                              if line.strip() and not line.startswith('#')]
+                packages = list(read_requirements(f, resolve=True))
             
-            # Use safety to check for vulnerabilities
-            from safety.safety import safety
-            checked = safety.check(requirements)
+            # Use safety to check for vulnerabilities, reusing its cached
+            # database for any later requirements file
+            vulnerabilities, _ = safety.check(
+                packages=packages,
+                key=os.environ.get('SAFETY_API_KEY', False),
+                db_mirror=False,
+                cached=_SAFETY_CACHE_SECONDS,
+                ignore_vulns={},
+                telemetry=False
+            )
             
             # Process the results
-            for vuln in checked:
-                if isinstance(vuln, tuple) and len(vuln) >= 5:
-                    name, version, spec, reason, vuln_id = vuln[:5]
-                    severity = self._convert_severity('high')  # Safety doesn't provide severity
-                    results.append(AnalysisResult(
-                        analysis_type=AnalysisType.DEP_CHECK,
-                        severity=severity,
-                        file_path=requirements_file,
-                        line_number=0,  # Requirements file
-                        message=f"Vulnerability in {name}=={version}: {reason}",
-                        metadata={
-                            'package': name,
-                            'version': version,
-                            'vuln_id': vuln_id,
-                            'spec': spec,
-                            'reason': reason
-                        }
-                    ))
+            severity = self._convert_severity('high')  # Safety doesn't provide severity
+            for vuln in vulnerabilities:
+                results.append(AnalysisResult(
+                    analysis_type=AnalysisType.DEP_CHECK,
+                    severity=severity,
+                    file_path=requirements_file,
+                    line_number=0,  # Requirements file
+                    message=f"Vulnerability in {vuln.package_name}=={vuln.analyzed_version}: {vuln.advisory}",
+                    metadata={
+                        'package': vuln.package_name,
+                        'version': vuln.analyzed_version,
+                        'vuln_id': vuln.vulnerability_id,
+                        'spec': vuln.vulnerable_spec,
+                        'reason': vuln.advisory
+                    }
+                ))
         except Exception as e:
             logging.error(f"Error analyzing requirements: {str(e)}")
             results.append(AnalysisResult(
@@ -320,83 +663,373 @@ class DependencyAnalyzer:
 
     def _convert_severity(self, safety_severity: str) -> Severity:
         """Convert Safety severity to our severity level"""
-        severity_map = {
-            'low': Severity.INFO,
-            'medium': Severity.WARNING,
-            'high': Severity.ERROR,
-            'critical': Severity.CRITICAL
-        }
-        return severity_map.get(safety_severity.lower(), Severity.WARNING)
+        return self.SEVERITY_MAP.get(safety_severity.lower(), Severity.WARNING)
+
+
+# Below this many files analyze_project stays in-process unless told otherwise
+_MIN_PARALLEL_FILES = 8
+
+# Directories never worth scanning for project sources: VCS metadata,
+# virtualenvs, tool caches and build output
+_SKIP_DIRS = frozenset({
+    '.git', '.hg', '.svn', '__pycache__', '.venv', 'venv',
+    'node_modules', '.tox', '.nox', '.mypy_cache', '.pytest_cache',
+    'build', 'dist', '.eggs', '.next', 'target', 'obj'
+})
+
+
+def _iter_python_files(root: str):
+    """Yield paths of Python files under root, pruning _SKIP_DIRS.
+
+    Uses os.scandir so the type of each entry comes from the directory
+    listing itself rather than an extra stat call per file.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.endswith('.py') and entry.is_file():
+                        yield entry.path
+        except OSError as e:
+            logging.warning(f"Cannot scan directory {directory}: {e}")
+
+
+def _read_source(file_path: str) -> Optional[bytes]:
+    """Read a file's raw bytes, or None if it cannot be read"""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+_severity_of = attrgetter('severity')
+_analysis_type_of = attrgetter('analysis_type')
+
+
+def _encode_results(results: List[AnalysisResult]) -> bytes:
+    """Serialize results as JSON, with enums stored by name"""
+    return json.dumps([
+        [
+            result.analysis_type.name, result.severity.name, result.file_path,
+            result.line_number, result.message, result.code,
+            result.fix_suggestion, result.metadata
+        ]
+        for result in results
+    ]).encode('utf-8')
+
+
+def _decode_results(payload: bytes) -> List[AnalysisResult]:
+    """Rebuild results serialized by _encode_results"""
+    return [
+        AnalysisResult(
+            AnalysisType[analysis_type], Severity[severity], file_path,
+            line_number, message, code, fix_suggestion, metadata
+        )
+        for (analysis_type, severity, file_path, line_number, message,
+             code, fix_suggestion, metadata) in json.loads(payload)
+    ]
+
+
+class ResultCache:
+    """On-disk SQLite cache of per-file analysis results.
+
+    Entries are keyed by the file's content digest when the caller has one,
+    so fresh checkouts and touched files still hit; otherwise by path, mtime
+    and size. Results are stored as JSON, so a tampered cache can at worst
+    report wrong findings, never run code.
+    """
+
+    # Bump whenever analyzer output changes so stale entries stop matching
+    VERSION = 6
+
+    def __init__(self, cache_dir: str, ttl: Optional[float] = None):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        # Worker processes each open their own connection; WAL lets them
+        # read while another writes
+        self.db = sqlite3.connect(str(self.cache_dir / 'results.sqlite'), timeout=30)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS cache '
+            '(key BLOB PRIMARY KEY, created REAL, results BLOB)'
+        )
+        self.db.commit()
+
+    def _key(self, file_path: str, context: str, digest: Optional[bytes]) -> Optional[bytes]:
+        """Build the cache key for the file's current content"""
+        if digest is not None:
+            key = (self.VERSION, file_path, digest, context)
+        else:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return None
+            key = (
+                self.VERSION,
+                file_path,
+                os.path.abspath(file_path),
+                stat.st_mtime_ns,
+                stat.st_size,
+                context
+            )
+        return hashlib.sha256(repr(key).encode()).digest()
+
+    def get(
+        self,
+        file_path: str,
+        context: str = '',
+        digest: Optional[bytes] = None
+    ) -> Optional[List[AnalysisResult]]:
+        """Return cached results for an unchanged file, or None on a miss"""
+        key = self._key(file_path, context, digest)
+        if key is None:
+            return None
+        try:
+            row = self.db.execute(
+                'SELECT created, results FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            created, payload = row
+            if self.ttl is not None and time.time() - created > self.ttl:
+                self.db.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self.db.commit()
+                return None
+            return _decode_results(payload)
+        except (sqlite3.Error, ValueError, KeyError, TypeError) as e:
+            logging.debug(f"Ignoring unreadable cache entry for {file_path}: {e}")
+            return None
+
+    def put(
+        self,
+        file_path: str,
+        results: List[AnalysisResult],
+        context: str = '',
+        digest: Optional[bytes] = None
+    ):
+        """Store results for the file's current content"""
+        key = self._key(file_path, context, digest)
+        if key is None:
+            return
+        try:
+            self.db.execute(
+                'INSERT OR REPLACE INTO cache (key, created, results) VALUES (?, ?, ?)',
+                (key, time.time(), _encode_results(results))
+            )
+            self.db.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.warning(f"Could not cache results for {file_path}: {e}")
+
+
+def _unique_results(results: List[AnalysisResult]) -> List[AnalysisResult]:
+    """Drop findings that repeat an earlier one exactly.
+
+    Findings are the same when they share file, position, type and message;
+    distinct matches on one line differ in their column.
+    """
+    seen = set()
+    unique = []
+    for result in results:
+        column = result.metadata.get('column') if result.metadata else None
+        key = (result.file_path, result.line_number, column, result.analysis_type, result.message)
+        if key not in seen:
+            seen.add(key)
+            unique.append(result)
+    return unique
 
 
 class StaticAnalysisEngine:
     """Main engine for running all static analysis checks"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        memo_size: int = 4096
+    ):
         self.pattern_analyzer = PatternAnalyzer()
         self.security_analyzer = SecurityAnalyzer()
         self.style_analyzer = StyleAnalyzer()
         self.dependency_analyzer = DependencyAnalyzer()
         self.results: List[AnalysisResult] = []
+        # Opt-in incremental mode: unchanged files reuse their previous results
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.cache = ResultCache(cache_dir, cache_ttl) if cache_dir else None
+        # In-memory LRU keyed by (path, rules, content digest), so repeated runs
+        # over identical content skip Bandit and Pylint entirely
+        self.memo_size = memo_size
+        self._memo: OrderedDict = OrderedDict()
 
     def analyze_file(self, file_path: str, security_rules: Optional[Dict] = None) -> List[AnalysisResult]:
         """Run all applicable analyzers on a file"""
+        return self.analyze_files([file_path], security_rules)
+
+    def analyze_files(self, file_paths: List[str], security_rules: Optional[Dict] = None) -> List[AnalysisResult]:
+        """Run all applicable analyzers on a batch of files"""
+        # Only analyze Python files
+        file_paths = [path for path in file_paths if path.endswith('.py')]
         self.results = []
+        if not file_paths:
+            return self.results
         
-        # Only analyze Python files
-        if not file_path.endswith('.py'):
-            return []
+        # Custom rules change the findings, so they are part of the cache keys
+        context = json.dumps(security_rules, sort_keys=True, default=str) if security_rules else ''
+        pending = []
+        memo_keys = {}
+        digests = {}
+        sources = {}
+        for file_path in file_paths:
+            cached = None
+            # Each file is read once; the bytes feed the cache keys, the
+            # pattern scan and the custom rules
+            source = _read_source(file_path)
+            digest = None
+            if source is not None and (self.memo_size > 0 or self.cache is not None):
+                digest = digests[file_path] = hashlib.blake2b(source, digest_size=16).digest()
+            if digest is not None and self.memo_size > 0:
+                memo_keys[file_path] = (file_path, context, digest)
+                cached = self._memo.get(memo_keys[file_path])
+            if cached is None and self.cache is not None:
+                cached = self.cache.get(file_path, context, digest)
+            if cached is None:
+                pending.append(file_path)
+                sources[file_path] = source
+            else:
+                self._remember(memo_keys.get(file_path), cached)
+                self.results.extend(cached)
         
-        # Run all analyzers
-        self.results.extend(self.pattern_analyzer.analyze_file(file_path))
-        self.results.extend(self.security_analyzer.analyze_file(file_path, security_rules))
-        self.results.extend(self.style_analyzer.analyze_file(file_path))
+        if pending:
+            results_by_file = {file_path: [] for file_path in pending}
+            for result in self._run_analyzers(pending, security_rules, sources):
+                results_by_file.setdefault(result.file_path, []).append(result)
+                self.results.append(result)
+            for file_path in pending:
+                self._remember(memo_keys.get(file_path), results_by_file[file_path])
+                if self.cache is not None:
+                    self.cache.put(file_path, results_by_file[file_path], context, digests.get(file_path))
         
         return self.results
 
-    def analyze_project(self, project_path: str, security_rules: Optional[Dict] = None) -> List[AnalysisResult]:
-        """Analyze an entire project"""
-        self.results = []
+    def _remember(self, key: Optional[Tuple[str, str, bytes]], results: List[AnalysisResult]):
+        """Record results in the in-memory LRU, evicting the oldest entry when full"""
+        if key is None:
+            return
+        self._memo[key] = results
+        self._memo.move_to_end(key)
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def _run_analyzers(
+        self,
+        file_paths: List[str],
+        security_rules: Optional[Dict],
+        sources: Optional[Dict[str, Optional[bytes]]] = None
+    ) -> List[AnalysisResult]:
+        """Run every analyzer over the batch; Bandit and Pylint each run once"""
+        sources = sources or {}
+        results = []
+        for file_path in file_paths:
+            results.extend(self.pattern_analyzer.analyze_file(file_path, sources.get(file_path)))
+        results.extend(self.security_analyzer.analyze_files(file_paths, security_rules, sources))
+        results.extend(self.style_analyzer.analyze_files(file_paths))
+        return _unique_results(results)
+
+    def analyze_project(
+        self,
+        project_path: str,
+        security_rules: Optional[Dict] = None,
+        max_workers: Optional[int] = None
+    ) -> List[AnalysisResult]:
+        """Analyze an entire project, spreading files across worker processes"""
         project_path = Path(project_path)
+        results = []
         
         # Analyze Python files
-        for py_file in project_path.rglob('*.py'):
-            self.results.extend(self.analyze_file(str(py_file), security_rules))
+        py_files = list(_iter_python_files(str(project_path)))
+        workers = min(max_workers or os.cpu_count() or 1, len(py_files))
+        if max_workers is None and len(py_files) < _MIN_PARALLEL_FILES:
+            # Process startup would outweigh the work on small projects
+            workers = 1
+        
+        if workers > 1:
+            # One interleaved batch per worker keeps the load even while each
+            # worker still gets to batch its share through Bandit and Pylint
+            batches = [py_files[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self.cache_dir, self.cache_ttl)
+            ) as executor:
+                for batch_results in executor.map(
+                    _analyze_in_worker,
+                    batches,
+                    repeat(security_rules)
+                ):
+                    results.extend(batch_results)
+        else:
+            results.extend(self.analyze_files(py_files, security_rules))
         
         # Analyze dependencies
         requirements_file = project_path / 'requirements.txt'
         if requirements_file.exists():
-            self.results.extend(
+            results.extend(
                 self.dependency_analyzer.analyze_requirements(str(requirements_file))
             )
         
+        self.results = results
         return self.results
 
     def get_summary(self) -> Dict[str, Any]:
         """Get a summary of analysis results"""
+        by_severity, by_type, critical_issues = self._summarize()
         return {
             'total_issues': len(self.results),
-            'by_severity': self._count_by_severity(),
-            'by_type': self._count_by_type(),
-            'critical_issues': self._get_critical_issues()
+            'by_severity': by_severity,
+            'by_type': by_type,
+            'critical_issues': critical_issues
         }
 
-    def _count_by_severity(self) -> Dict[str, int]:
-        """Count issues by severity"""
-        counts = {}
-        for result in self.results:
-            severity = result.severity.name
-            counts[severity] = counts.get(severity, 0) + 1
-        return counts
-
-    def _count_by_type(self) -> Dict[str, int]:
-        """Count issues by analysis type"""
-        counts = {}
-        for result in self.results:
-            analysis_type = result.analysis_type.name
-            counts[analysis_type] = counts.get(analysis_type, 0) + 1
-        return counts
-
-    def _get_critical_issues(self) -> List[AnalysisResult]:
-        """Get all critical severity issues"""
-        return [r for r in self.results if r.severity == Severity.CRITICAL]
+    def _summarize(self) -> Tuple[Dict[str, int], Dict[str, int], List[AnalysisResult]]:
+        """Count issues by severity and type and collect critical issues.
+
+        Counting runs in C over the enum members; the comparatively slow
+        enum .name lookup happens once per distinct member, not per result.
+        """
+        severities = list(map(_severity_of, self.results))
+        by_severity = {
+            severity.name: count for severity, count in Counter(severities).items()
+        }
+        by_type = {
+            analysis_type.name: count
+            for analysis_type, count in Counter(map(_analysis_type_of, self.results)).items()
+        }
+        critical = Severity.CRITICAL
+        critical_issues = [
+            result for result, severity in zip(self.results, severities)
+            if severity is critical
+        ]
+        return by_severity, by_type, critical_issues
+
+
+# Engine owned by each worker process in StaticAnalysisEngine.analyze_project
+_worker_engine: Optional[StaticAnalysisEngine] = None
+
+
+def _init_worker(cache_dir: Optional[str] = None, cache_ttl: Optional[float] = None):
+    """Build the per-process engine once, so analyzers are not rebuilt per file"""
+    global _worker_engine
+    _worker_engine = StaticAnalysisEngine(cache_dir, cache_ttl)
+
+
+def _analyze_in_worker(file_paths: List[str], security_rules: Optional[Dict]) -> List[AnalysisResult]:
+    """Analyze a batch of files inside a worker process"""
+    return _worker_engine.analyze_files(file_paths, security_rules)
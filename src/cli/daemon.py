@@ -0,0 +1,293 @@
+"""
+SafeAI CodeGuard Protocol - CLI Daemon
+Keeps a CommandLineInterface alive and serves CLI invocations over a Unix socket.
+
+Each request carries the working directory and environment of its client,
+which the daemon adopts while running it. The daemon does not notice code
+changes: the socket name tracks the installed version and location, so an
+upgrade starts a fresh daemon, but an editable install keeps serving the
+code it started with until the daemon is stopped.
+"""
+
+import io
+import json
+import logging
+import os
+import hashlib
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Any, List, Optional, Tuple
+
+from ..core import __version__
+from .main import CommandLineInterface
+
+logger = logging.getLogger(__name__)
+
+# Messages are a 4-byte big-endian length followed by that many bytes of JSON
+_HEADER = struct.Struct('>I')
+
+# How long a client waits for a daemon to accept before running in-process
+CONNECT_TIMEOUT = 0.005
+
+# Seconds after starting a daemon before another may be started
+SPAWN_BACKOFF = 60.0
+
+
+# Credentials of a Unix socket peer as returned by SO_PEERCRED: pid, uid, gid
+_PEER_CREDENTIALS = struct.Struct('3i')
+
+
+def socket_path() -> str:
+    """Get the per-user socket path, overridable with SACP_DAEMON_SOCKET.
+
+    The socket lives in a directory only its owner may enter, and is named
+    after the installed version and location of the package.
+    """
+    path = os.environ.get('SACP_DAEMON_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        directory = os.path.join(runtime_dir, 'sacp')
+    else:
+        directory = os.path.join(tempfile.gettempdir(), f'sacp-{os.getuid()}')
+    install = hashlib.sha256(os.path.dirname(os.path.abspath(__file__)).encode('utf-8'))
+    return os.path.join(directory, f'daemon-{__version__}-{install.hexdigest()[:12]}.sock')
+
+
+def _is_private_dir(path: str) -> bool:
+    """Check that path is a real directory owned by this user and closed to others"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(st.st_mode)
+        and st.st_uid == os.getuid()
+        and not st.st_mode & 0o077
+    )
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    """Get the uid of the process at the other end, if the platform reports it"""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    credentials = sock.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, _PEER_CREDENTIALS.size
+    )
+    return _PEER_CREDENTIALS.unpack(credentials)[1]
+
+
+def _trusted_peer(sock: socket.socket) -> bool:
+    """Check that the peer runs as this user, where the platform can tell"""
+    uid = _peer_uid(sock)
+    return uid is None or uid == os.getuid()
+
+
+def _send(sock: socket.socket, message: Any):
+    """Write one length-prefixed JSON message"""
+    payload = json.dumps(message).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes, failing if the peer hangs up first"""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-message")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def _recv(sock: socket.socket) -> Any:
+    """Read one length-prefixed JSON message"""
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+class _CommandHandler(socketserver.BaseRequestHandler):
+    """Run one CLI invocation in the daemon and send back its output"""
+
+    def handle(self):
+        if not _trusted_peer(self.request):
+            logger.warning("Rejected a connection from another user")
+            return
+        request = _recv(self.request)
+        out, err = io.StringIO(), io.StringIO()
+        # Relay warnings and errors to the client, whose stderr they belong on
+        log_handler = logging.StreamHandler(err)
+        log_handler.setLevel(logging.WARNING)
+        root_logger = logging.getLogger()
+        root_logger.addHandler(log_handler)
+        daemon_cwd = os.getcwd()
+        daemon_env = dict(os.environ)
+        try:
+            os.chdir(request['cwd'])
+            os.environ.clear()
+            os.environ.update(request['env'])
+            with redirect_stdout(out), redirect_stderr(err):
+                code = self.server.cli.run(request['argv'])
+        except Exception as e:
+            err.write(f"Error: {str(e)}\n")
+            code = 1
+        finally:
+            os.chdir(daemon_cwd)
+            os.environ.clear()
+            os.environ.update(daemon_env)
+            root_logger.removeHandler(log_handler)
+        _send(self.request, {'code': code, 'out': out.getvalue(), 'err': err.getvalue()})
+
+
+class CLIDaemon(socketserver.UnixStreamServer):
+    """Serves CLI invocations from one long-lived CommandLineInterface.
+
+    Requests are handled one at a time, since each changes the working
+    directory and environment of the daemon process to those of its client.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or socket_path()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not _is_private_dir(directory):
+            raise RuntimeError(
+                f"Refusing to serve from {directory}: it must be a directory "
+                "owned by the current user with no group or other access"
+            )
+        self.cli = CommandLineInterface()
+        self._remove_stale_socket()
+        # Only the owning user may connect
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(self.path, _CommandHandler)
+        finally:
+            os.umask(old_umask)
+
+    def _remove_stale_socket(self):
+        """Remove a socket left behind by a daemon that is no longer running"""
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+        else:
+            raise RuntimeError(f"A daemon is already serving {self.path}")
+        finally:
+            probe.close()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def request(
+    argv: List[str],
+    path: Optional[str] = None,
+    timeout: float = CONNECT_TIMEOUT
+) -> Optional[Tuple[int, str, str]]:
+    """Run argv in a daemon, returning (exit code, stdout, stderr).
+
+    Returns None when no daemon accepts the connection within timeout, or
+    when the socket or the process behind it cannot be trusted.
+    """
+    path = path or socket_path()
+    if not _is_private_dir(os.path.dirname(os.path.abspath(path))):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except OSError:
+            return None
+        if not _trusted_peer(sock):
+            logger.warning("Ignoring daemon at %s run by another user", path)
+            return None
+        # The command itself may take as long as it needs
+        sock.settimeout(None)
+        _send(sock, {'argv': argv, 'cwd': os.getcwd(), 'env': dict(os.environ)})
+        response = _recv(sock)
+        return response['code'], response['out'], response['err']
+    finally:
+        sock.close()
+
+
+def _import_root() -> str:
+    """Get the directory the top-level package of this module is imported from"""
+    root = os.path.abspath(__file__)
+    for _ in __spec__.name.split('.'):
+        root = os.path.dirname(root)
+    return root
+
+
+def spawn(path: Optional[str] = None) -> bool:
+    """Start a daemon in the background, detached from this process.
+
+    The daemon's output goes to a log file next to its socket. Each attempt
+    is recorded, and for SPAWN_BACKOFF seconds after one no further daemon
+    is started, so a daemon that fails to come up is not respawned by
+    every invocation. Returns whether a daemon was started.
+    """
+    path = path or socket_path()
+    directory = os.path.dirname(os.path.abspath(path))
+    marker = path + '.spawned'
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not _is_private_dir(directory):
+            logger.warning("Not starting a daemon in %s: it is not private to this user", directory)
+            return False
+        try:
+            if time.time() - os.stat(marker).st_mtime < SPAWN_BACKOFF:
+                logger.debug("A daemon was started recently; not starting another")
+                return False
+        except FileNotFoundError:
+            pass
+        with open(marker, 'w'):
+            pass
+        pythonpath = os.pathsep.join(
+            filter(None, (_import_root(), os.environ.get('PYTHONPATH')))
+        )
+        env = dict(os.environ, SACP_DAEMON_SOCKET=path, PYTHONPATH=pythonpath)
+        with open(path + '.log', 'ab') as log:
+            subprocess.Popen(
+                [sys.executable, '-m', __spec__.name],
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                start_new_session=True
+            )
+    except OSError as e:
+        logger.warning("Could not start the SACP daemon: %s", e)
+        return False
+    return True
+
+
+def main():
+    """Serve CLI invocations until interrupted or terminated"""
+    # Exit through the context manager on SIGTERM so the socket is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with CLIDaemon() as daemon:
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -4,16 +4,30 @@ Main CLI implementation.
 """
 
 import argparse
+import datetime
+import math
+import os
 import sys
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from functools import cached_property, lru_cache, singledispatch
+from itertools import repeat
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
 import json
-import yaml
+
+try:
+    import orjson  # C JSON encoder that emits bytes, optional
+except ImportError:
+    orjson = None
 
 from ..core.protocol import ComplianceLevel, SafetyLevel
-from ..analyzers.static import SecurityAnalyzer
-from ..verification.safety import SafetyVerification
+from .yaml_cache import dump as dump_yaml, load_cached
+
+if TYPE_CHECKING:
+    from ..analyzers.static import SecurityAnalyzer
+    from ..verification.safety import SafetyVerification
 
 
 class OutputFormat(str):
@@ -23,16 +37,260 @@ class OutputFormat(str):
     YAML = 'yaml'
 
 
+_FORMATS = ('text', 'json', 'yaml')
+
+
+def _choice(members: Dict[str, Any]):
+    """Build an argparse type mapping a name to its member in members.
+
+    Unknown names are rejected with the same message choices= would give.
+    """
+    choices = ', '.join(map(repr, members))
+
+    def convert(name: str):
+        try:
+            return members[name]
+        except KeyError:
+            raise argparse.ArgumentTypeError(
+                f"invalid choice: {name!r} (choose from {choices})"
+            ) from None
+    return convert
+
+
+def _metavar(names) -> str:
+    """Format names the way argparse lists choices in help and usage"""
+    return '{' + ','.join(names) + '}'
+
+
+def _existing_path(path: str) -> Path:
+    """Resolve path, rejecting it if it does not exist.
+
+    A strict resolve canonicalizes and checks existence in the same pass,
+    rather than resolving first and stat'ing again with exists().
+    """
+    try:
+        return Path(path).resolve(strict=True)
+    except (FileNotFoundError, NotADirectoryError):
+        raise argparse.ArgumentTypeError(
+            f"Path does not exist: {Path(path).resolve()}"
+        ) from None
+
+
+# Argument types: handlers receive resolved paths and enum members, and
+# invalid values are reported by argparse before any handler runs
+_safety_level = _choice(SafetyLevel.__members__)
+_compliance_level = _choice(ComplianceLevel.__members__)
+_output_format = _choice({name: name for name in _FORMATS})
+
+# Common invocations parsed without building the argparse tree: for each
+# command, whether it takes a path argument, its options as
+# flag -> (dest, type), and their defaults. Anything else, including --help
+# and invalid values, goes through argparse. Keep in sync with _create_parser.
+_FAST_COMMANDS = {
+    'init': (False, {
+        '--path': ('path', _existing_path),
+        '--safety-level': ('safety_level', _safety_level),
+        '--format': ('format', _output_format)
+    }, {'path': '.', 'safety_level': SafetyLevel.CONTROLLED.name, 'format': 'text'}),
+    'verify': (True, {
+        '--compliance-level': ('compliance_level', _compliance_level),
+        '--config': ('config', _existing_path),
+        '--format': ('format', _output_format)
+    }, {'compliance_level': ComplianceLevel.STANDARD.name, 'config': None, 'format': 'text'}),
+    'check': (True, {
+        '--rules': ('rules', _existing_path),
+        '--format': ('format', _output_format)
+    }, {'rules': None, 'format': 'text'}),
+    'analyze': (True, {
+        '--context': ('context', _existing_path),
+        '--format': ('format', _output_format)
+    }, {'context': None, 'format': 'text'})
+}
+
+
+def _fast_parse(args: List[str]) -> Optional[argparse.Namespace]:
+    """Parse a common invocation directly, or return None to defer to argparse"""
+    if not args or args[0] not in _FAST_COMMANDS:
+        return None
+    takes_path, options, defaults = _FAST_COMMANDS[args[0]]
+    values = dict(defaults)
+    types = dict(options.values())
+    path = None
+    tokens = iter(args[1:])
+    for token in tokens:
+        if token in options:
+            value = next(tokens, None)
+            if value is None or value.startswith('-'):
+                return None
+            values[options[token][0]] = value
+        elif token.startswith('-') or path is not None or not takes_path:
+            return None
+        else:
+            path = token
+    if takes_path:
+        if path is None:
+            return None
+        values['path'] = path
+        types['path'] = _existing_path
+    # Convert like argparse, which also applies types to string defaults
+    try:
+        for dest, convert in types.items():
+            if isinstance(values[dest], str):
+                values[dest] = convert(values[dest])
+    except argparse.ArgumentTypeError:
+        return None
+    return argparse.Namespace(command=args[0], **values)
+
+
+# Directories with fewer Python files than this are checked in-process
+_MIN_PARALLEL_FILES = 8
+
+# Analyzer owned by each worker process of CommandLineInterface._analyze_path
+_worker_analyzer: Optional['SecurityAnalyzer'] = None
+
+
+def _init_worker():
+    """Build the worker's analyzer once, before it receives any files"""
+    global _worker_analyzer
+    from ..analyzers.static import SecurityAnalyzer
+    _worker_analyzer = SecurityAnalyzer()
+
+
+def _analyze_chunk(file_paths: List[str], rules: Optional[Dict]) -> list:
+    """Analyze one chunk of files in a worker process"""
+    return _worker_analyzer.analyze_files(file_paths, rules)
+
+
+def _json_default(obj: Any) -> Any:
+    """Encode the non-JSON types orjson knows natively, the way orjson does"""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    from uuid import UUID
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite_floats(data: Any) -> Any:
+    """Copy data with NaN and infinities replaced by None, as orjson writes them"""
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, dict):
+        return {key: _finite_floats(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_finite_floats(item) for item in data]
+    return data
+
+
+def _encode_json(data: Any) -> bytes:
+    """Encode data as indented UTF-8 JSON, alike whether or not orjson is installed.
+
+    Both encoders indent by two spaces, keep non-ASCII text as-is, write
+    dates and times in ISO 8601 and NaN or infinities as null. Data orjson
+    would encode differently goes through the stdlib encoder: dicts with
+    non-string keys, and strings holding lone surrogates (such as file
+    names decoded with surrogateescape), which are written as \\u escapes.
+    The one difference left is the spelling of floats in exponent form,
+    e.g. 1e16 from orjson and 1e+16 from the stdlib, which parse to the
+    same value.
+    """
+    if orjson is not None:
+        option = (
+            orjson.OPT_INDENT_2
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+        try:
+            return orjson.dumps(data, default=_json_default, option=option)
+        except TypeError:
+            # Types orjson does not know; the stdlib encoder reports them
+            pass
+    options = dict(indent=2, allow_nan=False, default=_json_default)
+    try:
+        text = json.dumps(data, ensure_ascii=False, **options)
+    except ValueError as e:
+        if not str(e).startswith('Out of range float'):
+            raise
+        data = _finite_floats(data)
+        text = json.dumps(data, ensure_ascii=False, **options)
+    try:
+        return text.encode('utf-8')
+    except UnicodeEncodeError:
+        # Lone surrogates have no UTF-8 form; escape everything instead
+        return json.dumps(data, ensure_ascii=True, **options).encode('ascii')
+
+
+@singledispatch
+def _results_dict(results) -> Dict[str, Any]:
+    """Convert results to their output dict; results with a to_dict bring their own"""
+    return results.to_dict()
+
+
+@_results_dict.register
+def _(results: list) -> Dict[str, Any]:
+    return {
+        'results': [
+            r.to_dict() if hasattr(r, 'to_dict') else {
+                'severity': str(r.severity),
+                'message': str(r.message) if hasattr(r, 'message') else '',
+                'file': str(r.file) if hasattr(r, 'file') else '',
+                'line': r.line if hasattr(r, 'line') else None,
+                'details': r.details if hasattr(r, 'details') else {}
+            }
+            for r in results
+        ]
+    }
+
+
 class CommandLineInterface:
     """Command line interface for SACP"""
 
     def __init__(self):
-        self.parser = self._create_parser()
-        self.security_analyzer = SecurityAnalyzer()
-        self.safety_verification = SafetyVerification()
+        self.commands = {
+            'init': self._handle_init,
+            'verify': self._handle_verify,
+            'check': self._handle_check,
+            'analyze': self._handle_analyze
+        }
+        # Writers per output format; unknown formats fall back to text
+        self.message_writers = {
+            OutputFormat.JSON: self._message_json,
+            OutputFormat.YAML: self._message_yaml,
+            OutputFormat.TEXT: print
+        }
+        self.result_writers = {
+            OutputFormat.JSON: self._results_json,
+            OutputFormat.YAML: self._results_yaml,
+            OutputFormat.TEXT: self._print_results
+        }
 
-    def _create_parser(self) -> argparse.ArgumentParser:
-        """Create argument parser"""
+    @property
+    def parser(self) -> argparse.ArgumentParser:
+        """Full argument parser, built only once the fast path declines an invocation"""
+        return self._create_parser()
+
+    @cached_property
+    def security_analyzer(self) -> 'SecurityAnalyzer':
+        """Security analyzer, imported and built when a command first needs it"""
+        from ..analyzers.static import SecurityAnalyzer
+        return SecurityAnalyzer()
+
+    @cached_property
+    def safety_verification(self) -> 'SafetyVerification':
+        """Safety verification, imported and built when a command first needs it"""
+        from ..verification.safety import SafetyVerification
+        return SafetyVerification()
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _create_parser() -> argparse.ArgumentParser:
+        """Create argument parser, once per process.
+
+        The parser depends only on the level enums, so every instance (and
+        every daemon request) shares it; handlers must not mutate it.
+        """
         parser = argparse.ArgumentParser(
             description='SafeAI CodeGuard Protocol CLI'
         )
@@ -46,21 +304,21 @@ class CommandLineInterface:
         )
         init_parser.add_argument(
             '--path',
-            type=str,
+            type=_existing_path,
             default='.',
             help='Project path'
         )
         init_parser.add_argument(
             '--safety-level',
-            type=str,
-            choices=[level.name for level in SafetyLevel],
+            type=_safety_level,
+            metavar=_metavar(SafetyLevel.__members__),
             default=SafetyLevel.CONTROLLED.name,
             help='Safety level'
         )
         init_parser.add_argument(
             '--format',
-            type=str,
-            choices=['text', 'json', 'yaml'],
+            type=_output_format,
+            metavar=_metavar(_FORMATS),
             default='text',
             help='Output format'
         )
@@ -72,25 +330,25 @@ class CommandLineInterface:
         )
         verify_parser.add_argument(
             'path',
-            type=str,
+            type=_existing_path,
             help='Path to verify'
         )
         verify_parser.add_argument(
             '--compliance-level',
-            type=str,
-            choices=[level.name for level in ComplianceLevel],
+            type=_compliance_level,
+            metavar=_metavar(ComplianceLevel.__members__),
             default=ComplianceLevel.STANDARD.name,
             help='Compliance level'
         )
         verify_parser.add_argument(
             '--config',
-            type=str,
+            type=_existing_path,
             help='Path to config file'
         )
         verify_parser.add_argument(
             '--format',
-            type=str,
-            choices=['text', 'json', 'yaml'],
+            type=_output_format,
+            metavar=_metavar(_FORMATS),
             default='text',
             help='Output format'
         )
@@ -102,18 +360,18 @@ class CommandLineInterface:
         )
         check_parser.add_argument(
             'path',
-            type=str,
+            type=_existing_path,
             help='Path to check'
         )
         check_parser.add_argument(
             '--rules',
-            type=str,
+            type=_existing_path,
             help='Path to rules file'
         )
         check_parser.add_argument(
             '--format',
-            type=str,
-            choices=['text', 'json', 'yaml'],
+            type=_output_format,
+            metavar=_metavar(_FORMATS),
             default='text',
             help='Output format'
         )
@@ -125,18 +383,18 @@ class CommandLineInterface:
         )
         analyze_parser.add_argument(
             'path',
-            type=str,
+            type=_existing_path,
             help='Path to analyze'
         )
         analyze_parser.add_argument(
             '--context',
-            type=str,
+            type=_existing_path,
             help='Path to context file'
         )
         analyze_parser.add_argument(
             '--format',
-            type=str,
-            choices=['text', 'json', 'yaml'],
+            type=_output_format,
+            metavar=_metavar(_FORMATS),
             default='text',
             help='Output format'
         )
@@ -149,19 +407,13 @@ class CommandLineInterface:
             args = sys.argv[1:]
             
         try:
-            parsed_args = self.parser.parse_args(args)
+            parsed_args = _fast_parse(args) or self.parser.parse_args(args)
             
-            if parsed_args.command == 'init':
-                return self._handle_init(parsed_args)
-            elif parsed_args.command == 'verify':
-                return self._handle_verify(parsed_args)
-            elif parsed_args.command == 'check':
-                return self._handle_check(parsed_args)
-            elif parsed_args.command == 'analyze':
-                return self._handle_analyze(parsed_args)
-            else:
+            handler = self.commands.get(parsed_args.command)
+            if handler is None:
                 self.parser.print_help()
                 return 1
+            return handler(parsed_args)
                 
         except argparse.ArgumentError as e:
             logging.error(f"Argument error: {str(e)}")
@@ -175,40 +427,30 @@ class CommandLineInterface:
 
     def _handle_init(self, args) -> int:
         """Handle init command"""
-        project_path = Path(args.path).resolve()
-        if not project_path.exists():
-            logging.error(f"Project path does not exist: {project_path}")
-            return 1
-            
-        safety_level = SafetyLevel[args.safety_level]
+        project_path = args.path
         
         # Create config file
         config = {
-            'safety_level': safety_level.name,
+            'safety_level': args.safety_level.name,
             'initialized_at': str(project_path),
             'version': '1.0.0'
         }
         
+        # Encode once and write the bytes in a single call
+        encoded = _encode_json(config)
         config_path = project_path / '.sacp.json'
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(config_path, 'wb') as f:
+            f.write(encoded)
             
         self._output(f"Initialized SACP in {project_path}", args)
         return 0
 
     def _handle_verify(self, args) -> int:
         """Handle verify command"""
-        path = Path(args.path).resolve()
-        if not path.exists():
-            logging.error(f"Path does not exist: {path}")
-            return 1
-            
-        compliance_level = ComplianceLevel[args.compliance_level]
-        
         # Run verification
         results = self.safety_verification.verify(
-            str(path),
-            compliance_level=compliance_level
+            str(args.path),
+            compliance_level=args.compliance_level
         )
         
         self._output_results(results, args)
@@ -216,27 +458,13 @@ class CommandLineInterface:
 
     def _handle_check(self, args) -> int:
         """Handle check command"""
-        path = Path(args.path).resolve()
-        if not path.exists():
-            logging.error(f"Path does not exist: {path}")
-            return 1
-            
         # Load rules
         rules = {}
         if args.rules:
-            rules_path = Path(args.rules).resolve()
-            if not rules_path.exists():
-                logging.error(f"Rules file does not exist: {rules_path}")
-                return 1
-                
-            with open(rules_path) as f:
-                rules = yaml.safe_load(f)
+            rules = load_cached(args.rules)
         
         # Run checks
-        results = self.security_analyzer.analyze_file(
-            str(path),
-            rules=rules
-        )
+        results = self._analyze_path(args.path, rules)
         
         self._output_results(results, args)
         # Return 1 if any high severity issues found
@@ -244,108 +472,136 @@ class CommandLineInterface:
 
     def _handle_analyze(self, args) -> int:
         """Handle analyze command"""
-        path = Path(args.path).resolve()
-        if not path.exists():
-            logging.error(f"Path does not exist: {path}")
-            return 1
-            
         # Load context
         context = {}
         if args.context:
-            context_path = Path(args.context).resolve()
-            if not context_path.exists():
-                logging.error(f"Context file does not exist: {context_path}")
-                return 1
-                
-            with open(context_path) as f:
-                context = yaml.safe_load(f)
+            context = load_cached(args.context)
         
         # Run analysis
-        results = self.security_analyzer.analyze_file(str(path))
+        results = self._analyze_path(args.path)
         
         self._output_results(results, args)
         return 0
 
+    def _analyze_path(self, path: Path, rules: Optional[Dict] = None) -> list:
+        """Run the security analyzer over a file or every Python file in a directory.
+
+        Larger directories are split into chunks spread over a process pool,
+        with one SecurityAnalyzer per worker.
+        """
+        if not path.is_dir():
+            return self.security_analyzer.analyze_file(str(path), rules=rules)
+        
+        from ..analyzers.static import _iter_python_files
+        files = sorted(_iter_python_files(str(path)))
+        workers = min(os.cpu_count() or 1, len(files))
+        if workers < 2 or len(files) < _MIN_PARALLEL_FILES:
+            return self.security_analyzer.analyze_files(files, rules)
+        
+        # Several chunks per worker keep the load even when file sizes vary,
+        # while each chunk still goes through Bandit in a single run
+        chunk_size = math.ceil(len(files) / (workers * 4))
+        chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            for chunk_results in executor.map(_analyze_chunk, chunks, repeat(rules)):
+                results.extend(chunk_results)
+        return results
+
     def _output(self, message: str, args):
         """Output message in specified format"""
-        if args.format == OutputFormat.JSON:
-            print(json.dumps({'message': message}))
-        elif args.format == OutputFormat.YAML:
-            print(yaml.safe_dump({'message': message}))
-        else:
-            print(message)
+        self.message_writers.get(args.format, print)(message)
 
     def _output_results(self, results, args):
         """Output results in specified format"""
-        if isinstance(results, list):
-            # Convert list of results to dict format
-            results_dict = {
-                'results': [
-                    {
-                        'severity': str(r.severity),
-                        'message': str(r.message) if hasattr(r, 'message') else '',
-                        'file': str(r.file) if hasattr(r, 'file') else '',
-                        'line': r.line if hasattr(r, 'line') else None,
-                        'details': r.details if hasattr(r, 'details') else {}
-                    }
-                    for r in results
-                ]
-            }
-            
-            if args.format == OutputFormat.JSON:
-                print(json.dumps(results_dict, indent=2))
-            elif args.format == OutputFormat.YAML:
-                print(yaml.safe_dump(results_dict))
-            else:
-                self._print_results(results)
+        self.result_writers.get(args.format, self._print_results)(results)
+
+    def _message_json(self, message: str):
+        """Output a message as compact JSON"""
+        print(json.dumps({'message': message}))
+
+    def _message_yaml(self, message: str):
+        """Output a message as YAML"""
+        print(dump_yaml({'message': message}))
+
+    def _results_json(self, results):
+        """Output results as indented JSON"""
+        self._dump_json(_results_dict(results))
+
+    def _results_yaml(self, results):
+        """Output results as YAML"""
+        print(dump_yaml(_results_dict(results)))
+
+    def _dump_json(self, data):
+        """Write data to stdout as JSON.
+
+        With a real stdout, the encoded bytes go straight to the binary
+        buffer in one call.
+        """
+        encoded = _encode_json(data) + b'\n'
+        buffer = getattr(sys.stdout, 'buffer', None)
+        if buffer is not None:
+            sys.stdout.flush()
+            buffer.write(encoded)
+            buffer.flush()
         else:
-            # Handle single result object with to_dict method
-            if args.format == OutputFormat.JSON:
-                print(json.dumps(results.to_dict(), indent=2))
-            elif args.format == OutputFormat.YAML:
-                print(yaml.safe_dump(results.to_dict()))
-            else:
-                self._print_results(results)
+            sys.stdout.write(encoded.decode('utf-8'))
 
     def _print_results(self, results):
-        """Print results in text format"""
-        print("\nResults:")
-        print("-" * 50)
+        """Print results in text format, written to stdout in one call"""
+        lines = ["\nResults:", "-" * 50]
         
         if isinstance(results, list):
             # Print list of results
             for result in results:
-                print(f"\n- Severity: {result.severity}")
+                lines.append(f"\n- Severity: {result.severity}")
                 if hasattr(result, 'message'):
-                    print(f"  Message: {result.message}")
+                    lines.append(f"  Message: {result.message}")
                 if hasattr(result, 'file'):
-                    print(f"  File: {result.file}")
+                    lines.append(f"  File: {result.file}")
                 if hasattr(result, 'line'):
-                    print(f"  Line: {result.line}")
+                    lines.append(f"  Line: {result.line}")
                 if hasattr(result, 'details'):
-                    print(f"  Details: {result.details}")
+                    lines.append(f"  Details: {result.details}")
         else:
             # Print single result object
             if hasattr(results, 'passed'):
-                print(f"Status: {'PASSED' if results.passed else 'FAILED'}")
+                lines.append(f"Status: {'PASSED' if results.passed else 'FAILED'}")
                 
             if hasattr(results, 'violations'):
                 if results.violations:
-                    print("\nViolations:")
+                    lines.append("\nViolations:")
                     for violation in results.violations:
-                        print(f"\n- {violation.rule_name}")
-                        print(f"  Severity: {violation.severity}")
-                        print(f"  Location: {violation.file_path}:{violation.line_number}")
-                        print(f"  Description: {violation.description}")
+                        lines.append(f"\n- {violation.rule_name}")
+                        lines.append(f"  Severity: {violation.severity}")
+                        lines.append(f"  Location: {violation.file_path}:{violation.line_number}")
+                        lines.append(f"  Description: {violation.description}")
                         
             if hasattr(results, 'warnings'):
                 if results.warnings:
-                    print("\nWarnings:")
+                    lines.append("\nWarnings:")
                     for warning in results.warnings:
-                        print(f"- {warning}")
+                        lines.append(f"- {warning}")
+        
+        lines.append('')
+        sys.stdout.write('\n'.join(lines))
 
 
 def main():
-    """Main entry point"""
+    """Main entry point.
+
+    With SACP_DAEMON set, commands are handed to a background daemon that
+    keeps the CLI loaded between calls; the first call starts the daemon
+    and runs in-process.
+    """
+    if os.environ.get('SACP_DAEMON'):
+        from . import daemon
+        response = daemon.request(sys.argv[1:])
+        if response is not None:
+            code, out, err = response
+            sys.stdout.write(out)
+            sys.stderr.write(err)
+            sys.exit(code)
+        daemon.spawn()
     cli = CommandLineInterface()
     sys.exit(cli.run())
@@ -0,0 +1,109 @@
+"""
+SafeAI CodeGuard Protocol - YAML Parse Cache
+Reuses parsed rules and context files across CLI invocations.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Union
+
+# Cached parses kept before the least recently used are evicted
+MAX_ENTRIES = 2000
+
+
+def dump(data: Any) -> str:
+    """Emit data as YAML.
+
+    The YAML library is only imported here and on a cache miss in
+    load_cached, so runs that never touch YAML don't pay for loading it.
+    """
+    import yaml
+    # libyaml-backed emitting, when PyYAML was built with it
+    return yaml.dump(data, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper))
+
+
+def default_cache_dir() -> Path:
+    """Get the parse cache directory, overridable with SACP_YAML_CACHE_DIR"""
+    cache_dir = os.environ.get('SACP_YAML_CACHE_DIR')
+    if cache_dir:
+        return Path(cache_dir)
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'sacp' / 'yaml'
+
+
+def load_cached(path: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None) -> Any:
+    """Parse a YAML file, reusing the result of an earlier parse of the same bytes.
+
+    Entries are keyed by a digest of the file's content, so edits are picked
+    up immediately. They are stored as JSON, which decoding cannot turn into
+    code execution, and parses JSON can't represent exactly (dates, binary,
+    non-string keys) are not cached. Cache failures never fail the load; an
+    unreadable entry counts as a miss and the file is parsed.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    entry = cache_dir / f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.json"
+
+    try:
+        with open(entry, 'rb') as f:
+            parsed = json.loads(f.read())
+        # Touch the entry so eviction sees it as recently used
+        os.utime(entry)
+        return parsed
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable YAML cache entry {entry}: {str(e)}")
+
+    import yaml
+    parsed = yaml.load(data, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+    if _is_json(parsed):
+        try:
+            _store(cache_dir, entry, parsed)
+        except Exception as e:
+            logging.warning(f"Could not cache parsed YAML for {path}: {str(e)}")
+    return parsed
+
+
+def _is_json(value: Any) -> bool:
+    """Check whether value survives a JSON round trip unchanged"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return True
+    if isinstance(value, list):
+        return all(_is_json(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_json(item) for key, item in value.items())
+    return False
+
+
+def _store(cache_dir: Path, entry: Path, parsed: Any):
+    """Write an entry atomically, then trim the cache to MAX_ENTRIES"""
+    cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(parsed, f)
+        os.replace(tmp_path, entry)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    _evict(cache_dir)
+
+
+def _evict(cache_dir: Path):
+    """Remove the least recently used entries beyond MAX_ENTRIES"""
+    with os.scandir(cache_dir) as entries:
+        cached = [entry for entry in entries if entry.name.endswith('.json')]
+    if len(cached) <= MAX_ENTRIES:
+        return
+    cached.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in cached[:len(cached) - MAX_ENTRIES]:
+        try:
+            os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
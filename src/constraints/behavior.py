@@ -3,16 +3,17 @@ SafeAI CodeGuard Protocol - AI Behavior Constraints
 Implements context-aware safety rules, permission controls, and intent validation.
 """
 
-import re
+import os
 import ast
 import logging
-from typing import Dict, List, Optional, Set, Any, Callable
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Set, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from datetime import datetime, timedelta
 import json
-from pathlib import Path
 import threading
+import time
 from collections import deque
 
 
@@ -24,6 +25,11 @@ class ContextType(Enum):
     SYSTEM_CONTEXT = auto()    # System state and resources
     SECURITY_CONTEXT = auto()  # Security and permissions
 
+    # Members are singletons compared by identity, so they can hash by
+    # identity in C rather than by name through Enum.__hash__; they key
+    # every context history and lookup table
+    __hash__ = object.__hash__
+
 
 class IntentType(Enum):
     """Types of AI operation intents"""
@@ -33,6 +39,9 @@ class IntentType(Enum):
     EXECUTE = auto()       # Executing commands
     INSTALL = auto()       # Installing dependencies
 
+    # Identity hash, as for ContextType
+    __hash__ = object.__hash__
+
 
 class RiskLevel(Enum):
     """Risk levels for AI operations"""
@@ -65,6 +74,134 @@ class Intent:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
+# Risk levels indexed by their value, for mapping scores without an Enum lookup
+_RISK_LEVELS = tuple(sorted(RiskLevel, key=lambda level: level.value))
+
+# Contexts an intent must carry to be considered at all
+_REQUIRED_CONTEXTS: Dict[IntentType, frozenset] = {
+    IntentType.READ: frozenset({ContextType.CODE_CONTEXT}),
+    IntentType.SUGGEST: frozenset({ContextType.CODE_CONTEXT, ContextType.USER_CONTEXT}),
+    IntentType.MODIFY: frozenset({
+        ContextType.CODE_CONTEXT,
+        ContextType.USER_CONTEXT,
+        ContextType.SECURITY_CONTEXT
+    }),
+    IntentType.EXECUTE: frozenset({
+        ContextType.RUNTIME_CONTEXT,
+        ContextType.SECURITY_CONTEXT,
+        ContextType.SYSTEM_CONTEXT
+    }),
+    IntentType.INSTALL: frozenset({
+        ContextType.RUNTIME_CONTEXT,
+        ContextType.SECURITY_CONTEXT
+    })
+}
+
+# Intent type base risks
+_BASE_RISKS: Dict[IntentType, int] = {
+    IntentType.READ: 0,
+    IntentType.SUGGEST: 1,
+    IntentType.MODIFY: 2,
+    IntentType.EXECUTE: 3,
+    IntentType.INSTALL: 3
+}
+
+# Intent types for which create_intent gathers each optional context
+_CODE_CONTEXT_INTENTS = frozenset({IntentType.READ, IntentType.SUGGEST, IntentType.MODIFY})
+_RUNTIME_CONTEXT_INTENTS = frozenset({IntentType.EXECUTE, IntentType.INSTALL})
+_SYSTEM_CONTEXT_INTENTS = frozenset({IntentType.EXECUTE, IntentType.MODIFY})
+
+# Intents that always run at a HIGH security level
+_ELEVATED_INTENTS = frozenset({IntentType.EXECUTE, IntentType.INSTALL})
+
+_HIGH_RISK_PERMISSIONS = frozenset({'EXECUTE', 'MODIFY_SYSTEM', 'INSTALL'})
+_RISKY_MODULES = frozenset({'os', 'sys', 'subprocess', 'eval', 'exec'})
+
+
+class _SystemSample(NamedTuple):
+    """One reading of the metrics behind system context"""
+    cpu_percent: float
+    memory_percent: float
+    disk_usage: float
+    open_files: int
+
+
+# Seconds for which one system sample serves every analysis
+_SYSTEM_SAMPLE_TTL = 0.5
+
+
+@lru_cache(maxsize=1)
+def _sample_system(period: int) -> _SystemSample:
+    """Read the system metrics once per sampling period.
+
+    Callers pass the number of the current period, so the first call in a
+    new period replaces the cached sample with a fresh one.
+    """
+    import psutil
+    
+    return _SystemSample(
+        cpu_percent=psutil.cpu_percent(),
+        memory_percent=psutil.virtual_memory().percent,
+        disk_usage=psutil.disk_usage('/').percent,
+        open_files=len(psutil.Process().open_files())
+    )
+
+
+# System directories, parent directory and home directory references
+_SUSPICIOUS_PATH_PARTS = (
+    '/etc/', '/usr/', '/bin/', '/sbin/', '/dev/', '/proc/', '/sys/',
+    '../',  # Parent directory
+    '~/'    # Home directory
+)
+
+
+def _is_suspicious_path(path: str) -> bool:
+    """Check whether path contains any suspicious part.
+
+    Plain substring tests in C beat a regex scan for strings this short.
+    """
+    for part in _SUSPICIOUS_PATH_PARTS:
+        if part in path:
+            return True
+    return False
+
+
+@lru_cache(maxsize=256)
+def _parse_code(file_path: str, mtime_ns: int, size: int) -> Tuple[Tuple[str, ...], Dict[str, int]]:
+    """Parse a file into its imported module names and complexity, once per version of the file.
+
+    The modification time and size are part of the cache key, so an edited
+    file is parsed again. The complexity dict is shared between callers and
+    must be copied before it is handed out.
+    """
+    with open(file_path, 'r') as f:
+        content = f.read()
+    tree = ast.parse(content)
+    
+    # Collect imports and count definitions in a single walk, classifying
+    # each node by its exact type (none of these have subclasses)
+    imports = []
+    functions = classes = 0
+    for node in ast.walk(tree):
+        node_type = type(node)
+        if node_type is ast.FunctionDef:
+            functions += 1
+        elif node_type is ast.ClassDef:
+            classes += 1
+        elif node_type is ast.Import:
+            imports.extend(alias.name for alias in node.names)
+        elif node_type is ast.ImportFrom:
+            # Relative imports keep their leading dots
+            imports.append('.' * node.level + (node.module or ''))
+    
+    complexity = {
+        'lines': len(content.splitlines()),
+        'functions': functions,
+        'classes': classes
+    }
+    return tuple(imports), complexity
+
+
 class ContextAnalyzer:
     """Analyzes and maintains operation context"""
 
@@ -72,81 +209,94 @@ class ContextAnalyzer:
         self.context_history: Dict[ContextType, deque] = {
             ct: deque(maxlen=1000) for ct in ContextType
         }
-        self.context_lock = threading.Lock()
-
-    def analyze_code_context(self, file_path: str) -> OperationContext:
+        # One lock per history, so analyses of different kinds never contend
+        self.context_locks: Dict[ContextType, threading.Lock] = {
+            ct: threading.Lock() for ct in ContextType
+        }
+        # Monotonic times of user contexts and of high-risk security contexts,
+        # oldest first, so recent counts drop expired entries instead of
+        # rescanning the histories
+        self._user_times: deque = deque()
+        self._violation_times: deque = deque()
+        # Environment recorded by the last runtime context, reused by later
+        # ones while the environment is unchanged
+        self._env_snapshot: Dict[str, str] = {}
+
+    def analyze_code_context(
+        self,
+        file_path: str,
+        now: Optional[datetime] = None
+    ) -> OperationContext:
         """Analyze code structure and dependencies"""
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-                tree = ast.parse(content)
-                
-                # Analyze imports and dependencies
-                imports = []
-                for node in ast.walk(tree):
-                    if isinstance(node, (ast.Import, ast.ImportFrom)):
-                        imports.append(ast.unparse(node))
-                
-                # Analyze code complexity
-                complexity = {
-                    'lines': len(content.splitlines()),
-                    'functions': len([n for n in ast.walk(tree) 
-                                   if isinstance(n, ast.FunctionDef)]),
-                    'classes': len([n for n in ast.walk(tree)
-                                  if isinstance(n, ast.ClassDef)])
-                }
-                
-                context = OperationContext(
-                    context_type=ContextType.CODE_CONTEXT,
-                    timestamp=datetime.now(),
-                    data={
-                        'imports': imports,
-                        'complexity': complexity,
-                        'file_path': file_path
-                    },
-                    risk_level=self._assess_code_risk(complexity, imports)
-                )
-                
-                with self.context_lock:
-                    self.context_history[ContextType.CODE_CONTEXT].append(context)
-                
-                return context
+            # Repeat analyses of an unchanged file reuse its parse
+            stat = os.stat(file_path)
+            imports, complexity = _parse_code(
+                os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+            )
+            imports, complexity = list(imports), dict(complexity)
+            
+            context = OperationContext(
+                context_type=ContextType.CODE_CONTEXT,
+                timestamp=now or datetime.now(),
+                data={
+                    'imports': imports,
+                    'complexity': complexity,
+                    'file_path': file_path
+                },
+                risk_level=self._assess_code_risk(complexity, imports),
+                # Lets path validation skip a second stat of the same file
+                metadata={'stat': stat}
+            )
+            
+            self._record(context)
+            
+            return context
                 
         except Exception as e:
             logging.error(f"Error analyzing code context: {str(e)}")
-            return self._create_error_context(ContextType.CODE_CONTEXT)
+            return self._create_error_context(ContextType.CODE_CONTEXT, now)
 
-    def analyze_runtime_context(self) -> OperationContext:
-        """Analyze runtime environment state"""
+    def analyze_runtime_context(self, now: Optional[datetime] = None) -> OperationContext:
+        """Analyze runtime environment state.
+
+        env_vars is a snapshot of the environment at analysis time. Contexts
+        taken while it is unchanged share one snapshot, which callers must
+        not modify.
+        """
         import sys
-        import os
+        
+        env = dict(os.environ)
+        if env != self._env_snapshot:
+            self._env_snapshot = env
         
         context = OperationContext(
             context_type=ContextType.RUNTIME_CONTEXT,
-            timestamp=datetime.now(),
+            timestamp=now or datetime.now(),
             data={
                 'python_version': sys.version,
                 'platform': sys.platform,
-                'env_vars': dict(os.environ),
+                # Kept history shares one copy per distinct environment
+                'env_vars': self._env_snapshot,
                 'cwd': os.getcwd()
             },
             risk_level=RiskLevel.LOW
         )
         
-        with self.context_lock:
-            self.context_history[ContextType.RUNTIME_CONTEXT].append(context)
+        self._record(context)
         
         return context
 
     def analyze_user_context(
         self,
         user_id: str,
-        session_data: Dict[str, Any]
+        session_data: Dict[str, Any],
+        now: Optional[datetime] = None
     ) -> OperationContext:
         """Analyze user interaction patterns"""
         context = OperationContext(
             context_type=ContextType.USER_CONTEXT,
-            timestamp=datetime.now(),
+            timestamp=now or datetime.now(),
             data={
                 'user_id': user_id,
                 'session_data': session_data,
@@ -155,41 +305,35 @@ class ContextAnalyzer:
             risk_level=self._assess_user_risk(user_id, session_data)
         )
         
-        with self.context_lock:
-            self.context_history[ContextType.USER_CONTEXT].append(context)
+        self._record(context)
         
         return context
 
-    def analyze_system_context(self) -> OperationContext:
+    def analyze_system_context(self, now: Optional[datetime] = None) -> OperationContext:
         """Analyze system state"""
-        import psutil
+        sample = _sample_system(int(time.monotonic() / _SYSTEM_SAMPLE_TTL))
         
         context = OperationContext(
             context_type=ContextType.SYSTEM_CONTEXT,
-            timestamp=datetime.now(),
-            data={
-                'cpu_percent': psutil.cpu_percent(),
-                'memory_percent': psutil.virtual_memory().percent,
-                'disk_usage': psutil.disk_usage('/').percent,
-                'open_files': len(psutil.Process().open_files())
-            },
-            risk_level=self._assess_system_risk()
+            timestamp=now or datetime.now(),
+            data=sample._asdict(),
+            risk_level=self._assess_system_risk(sample)
         )
         
-        with self.context_lock:
-            self.context_history[ContextType.SYSTEM_CONTEXT].append(context)
+        self._record(context)
         
         return context
 
     def analyze_security_context(
         self,
         permissions: Set[str],
-        security_level: str
+        security_level: str,
+        now: Optional[datetime] = None
     ) -> OperationContext:
         """Analyze security state and permissions"""
         context = OperationContext(
             context_type=ContextType.SECURITY_CONTEXT,
-            timestamp=datetime.now(),
+            timestamp=now or datetime.now(),
             data={
                 'permissions': list(permissions),
                 'security_level': security_level,
@@ -198,8 +342,7 @@ class ContextAnalyzer:
             risk_level=self._assess_security_risk(permissions, security_level)
         )
         
-        with self.context_lock:
-            self.context_history[ContextType.SECURITY_CONTEXT].append(context)
+        self._record(context)
         
         return context
 
@@ -219,12 +362,11 @@ class ContextAnalyzer:
         if complexity['classes'] > 20:
             risk_score += 1
         
-        # Risky imports
-        risky_modules = {'os', 'sys', 'subprocess', 'eval', 'exec'}
-        if any(any(m in imp for m in risky_modules) for imp in imports):
+        # Risky imports, by top-level module name
+        if not _RISKY_MODULES.isdisjoint(imp.partition('.')[0] for imp in imports):
             risk_score += 2
         
-        return RiskLevel(min(risk_score, 4))
+        return _RISK_LEVELS[min(risk_score, 4)]
 
     def _assess_user_risk(
         self,
@@ -235,10 +377,8 @@ class ContextAnalyzer:
         risk_score = 0
         
         # Check rapid operations
-        recent_ops = len([
-            c for c in self.context_history[ContextType.USER_CONTEXT]
-            if (datetime.now() - c.timestamp).seconds < 60
-        ])
+        with self.context_locks[ContextType.USER_CONTEXT]:
+            recent_ops = self._count_recent(self._user_times, 60)
         if recent_ops > 30:  # More than 30 operations per minute
             risk_score += 2
         
@@ -246,23 +386,21 @@ class ContextAnalyzer:
         if session_data.get('failed_operations', 0) > 5:
             risk_score += 1
         
-        return RiskLevel(min(risk_score, 4))
+        return _RISK_LEVELS[min(risk_score, 4)]
 
-    def _assess_system_risk(self) -> RiskLevel:
+    def _assess_system_risk(self, sample: _SystemSample) -> RiskLevel:
         """Assess risk level based on system state"""
-        import psutil
-        
         risk_score = 0
         
         # Resource usage
-        if psutil.cpu_percent() > 80:
+        if sample.cpu_percent > 80:
             risk_score += 1
-        if psutil.virtual_memory().percent > 80:
+        if sample.memory_percent > 80:
             risk_score += 1
-        if psutil.disk_usage('/').percent > 90:
+        if sample.disk_usage > 90:
             risk_score += 2
         
-        return RiskLevel(min(risk_score, 4))
+        return _RISK_LEVELS[min(risk_score, 4)]
 
     def _assess_security_risk(
         self,
@@ -273,8 +411,7 @@ class ContextAnalyzer:
         risk_score = 0
         
         # High-risk permissions
-        high_risk_perms = {'EXECUTE', 'MODIFY_SYSTEM', 'INSTALL'}
-        if any(p in high_risk_perms for p in permissions):
+        if not _HIGH_RISK_PERMISSIONS.isdisjoint(permissions):
             risk_score += 2
         
         # Security level
@@ -283,21 +420,41 @@ class ContextAnalyzer:
         elif security_level == 'MINIMAL':
             risk_score += 2
         
-        return RiskLevel(min(risk_score, 4))
+        return _RISK_LEVELS[min(risk_score, 4)]
 
     def _count_recent_violations(self) -> int:
         """Count security violations in the last hour"""
-        hour_ago = datetime.now() - timedelta(hours=1)
-        return len([
-            c for c in self.context_history[ContextType.SECURITY_CONTEXT]
-            if c.timestamp > hour_ago and c.risk_level >= RiskLevel.HIGH
-        ])
-
-    def _create_error_context(self, context_type: ContextType) -> OperationContext:
+        with self.context_locks[ContextType.SECURITY_CONTEXT]:
+            return self._count_recent(self._violation_times, 3600)
+
+    @staticmethod
+    def _count_recent(times: deque, window: float) -> int:
+        """Drop times more than window seconds old and count those left"""
+        cutoff = time.monotonic() - window
+        while times and times[0] <= cutoff:
+            times.popleft()
+        return len(times)
+
+    def _record(self, context: OperationContext):
+        """Append a context to the history of its type"""
+        context_type = context.context_type
+        with self.context_locks[context_type]:
+            self.context_history[context_type].append(context)
+            if context_type is ContextType.USER_CONTEXT:
+                self._user_times.append(time.monotonic())
+            elif (context_type is ContextType.SECURITY_CONTEXT and
+                  context.risk_level.value >= RiskLevel.HIGH.value):
+                self._violation_times.append(time.monotonic())
+
+    def _create_error_context(
+        self,
+        context_type: ContextType,
+        now: Optional[datetime] = None
+    ) -> OperationContext:
         """Create an error context when analysis fails"""
         return OperationContext(
             context_type=context_type,
-            timestamp=datetime.now(),
+            timestamp=now or datetime.now(),
             data={'error': 'Analysis failed'},
             risk_level=RiskLevel.HIGH
         )
@@ -306,8 +463,8 @@ class ContextAnalyzer:
 class IntentValidator:
     """Validates AI operation intents"""
 
-    def __init__(self):
-        self.context_analyzer = ContextAnalyzer()
+    def __init__(self, context_analyzer: Optional[ContextAnalyzer] = None):
+        self.context_analyzer = context_analyzer or ContextAnalyzer()
         self.validators: Dict[IntentType, List[Callable]] = {
             intent_type: [] for intent_type in IntentType
         }
@@ -341,31 +498,16 @@ class IntentValidator:
         """Validate basic intent requirements"""
         try:
             # Check for required context
-            required_contexts = {
-                IntentType.READ: {ContextType.CODE_CONTEXT},
-                IntentType.SUGGEST: {ContextType.CODE_CONTEXT, ContextType.USER_CONTEXT},
-                IntentType.MODIFY: {
-                    ContextType.CODE_CONTEXT,
-                    ContextType.USER_CONTEXT,
-                    ContextType.SECURITY_CONTEXT
-                },
-                IntentType.EXECUTE: {
-                    ContextType.RUNTIME_CONTEXT,
-                    ContextType.SECURITY_CONTEXT,
-                    ContextType.SYSTEM_CONTEXT
-                },
-                IntentType.INSTALL: {
-                    ContextType.RUNTIME_CONTEXT,
-                    ContextType.SECURITY_CONTEXT
-                }
-            }
-            
-            if not all(ct in intent.context for ct in required_contexts[intent.intent_type]):
+            if not intent.context.keys() >= _REQUIRED_CONTEXTS[intent.intent_type]:
                 logging.warning(f"Missing required context for {intent.intent_type}")
                 return False
             
-            # Validate target paths
-            if not self._validate_paths(intent.target_paths):
+            # Validate target paths, trusting the stat taken by code analysis
+            existing = set()
+            code_context = intent.context.get(ContextType.CODE_CONTEXT)
+            if code_context is not None and 'stat' in code_context.metadata:
+                existing.add(code_context.data['file_path'])
+            if not self._validate_paths(intent.target_paths, existing):
                 return False
             
             return True
@@ -377,20 +519,12 @@ class IntentValidator:
     def _validate_risk_level(self, intent: Intent) -> bool:
         """Validate intent risk level"""
         # Calculate combined risk from context
-        context_risks = [ctx.risk_level.value for ctx in intent.context.values()]
-        max_context_risk = max(context_risks) if context_risks else 0
-        
-        # Intent type base risks
-        base_risks = {
-            IntentType.READ: 0,
-            IntentType.SUGGEST: 1,
-            IntentType.MODIFY: 2,
-            IntentType.EXECUTE: 3,
-            IntentType.INSTALL: 3
-        }
+        max_context_risk = max(
+            (ctx.risk_level.value for ctx in intent.context.values()), default=0
+        )
         
         # Calculate total risk
-        total_risk = max(base_risks[intent.intent_type], max_context_risk)
+        total_risk = max(_BASE_RISKS[intent.intent_type], max_context_risk)
         
         # Check if estimated risk matches calculated risk
         if intent.estimated_risk.value < total_risk:
@@ -402,32 +536,21 @@ class IntentValidator:
         
         return True
 
-    def _validate_paths(self, paths: List[str]) -> bool:
-        """Validate target paths"""
+    def _validate_paths(self, paths: List[str], existing: Set[str] = frozenset()) -> bool:
+        """Validate target paths; those in existing are already known to exist"""
         for path in paths:
             try:
-                path = Path(path)
+                # Work on the path string itself rather than building a Path
+                path = os.fspath(path)
                 
-                # Check if path exists
-                if not path.exists():
-                    logging.warning(f"Path does not exist: {path}")
+                # Check for suspicious patterns, a string scan, before any stat
+                if _is_suspicious_path(path):
+                    logging.warning(f"Suspicious path pattern detected: {path}")
                     return False
                 
-                # Check for suspicious patterns
-                suspicious_patterns = [
-                    r'/etc/',
-                    r'/usr/',
-                    r'/bin/',
-                    r'/sbin/',
-                    r'/dev/',
-                    r'/proc/',
-                    r'/sys/',
-                    r'\.\./',  # Parent directory
-                    r'~/'      # Home directory
-                ]
-                
-                if any(re.search(pattern, str(path)) for pattern in suspicious_patterns):
-                    logging.warning(f"Suspicious path pattern detected: {path}")
+                # Check if path exists
+                if path not in existing and not os.path.exists(path):
+                    logging.warning(f"Path does not exist: {path}")
                     return False
                 
             except Exception as e:
@@ -440,10 +563,14 @@ class IntentValidator:
 class BehaviorConstraints:
     """Main system for enforcing AI behavior constraints"""
 
-    def __init__(self):
+    def __init__(self, max_history: int = 10000):
         self.context_analyzer = ContextAnalyzer()
-        self.intent_validator = IntentValidator()
-        self.operation_history: List[Intent] = []
+        # One analyzer, so validation sees the same recent activity
+        self.intent_validator = IntentValidator(self.context_analyzer)
+        self.operation_history: deque = deque(maxlen=max_history)
+        # Latest context time of each recorded intent or any before it, so
+        # the times never decrease and recent intents form a suffix
+        self._history_times: deque = deque(maxlen=max_history)
         self.history_lock = threading.Lock()
 
     def create_intent(
@@ -457,31 +584,35 @@ class BehaviorConstraints:
     ) -> Optional[Intent]:
         """Create and validate an operation intent"""
         try:
-            # Gather all context
+            # Gather all context, stamped with one time for the whole intent
             context = {}
+            now = datetime.now()
             
             # Code context (if applicable)
-            if target_paths and intent_type in {IntentType.READ, IntentType.SUGGEST, IntentType.MODIFY}:
-                context[ContextType.CODE_CONTEXT] = self.context_analyzer.analyze_code_context(target_paths[0])
+            if target_paths and intent_type in _CODE_CONTEXT_INTENTS:
+                context[ContextType.CODE_CONTEXT] = self.context_analyzer.analyze_code_context(
+                    target_paths[0], now
+                )
             
             # Runtime context
-            if intent_type in {IntentType.EXECUTE, IntentType.INSTALL}:
-                context[ContextType.RUNTIME_CONTEXT] = self.context_analyzer.analyze_runtime_context()
+            if intent_type in _RUNTIME_CONTEXT_INTENTS:
+                context[ContextType.RUNTIME_CONTEXT] = self.context_analyzer.analyze_runtime_context(now)
             
             # User context
             context[ContextType.USER_CONTEXT] = self.context_analyzer.analyze_user_context(
-                user_id, session_data
+                user_id, session_data, now
             )
             
             # System context
-            if intent_type in {IntentType.EXECUTE, IntentType.MODIFY}:
-                context[ContextType.SYSTEM_CONTEXT] = self.context_analyzer.analyze_system_context()
+            if intent_type in _SYSTEM_CONTEXT_INTENTS:
+                context[ContextType.SYSTEM_CONTEXT] = self.context_analyzer.analyze_system_context(now)
             
             # Security context
             if required_permissions:
                 context[ContextType.SECURITY_CONTEXT] = self.context_analyzer.analyze_security_context(
                     required_permissions,
-                    self._determine_security_level(intent_type, required_permissions)
+                    self._determine_security_level(intent_type, required_permissions),
+                    now
                 )
             
             # Calculate estimated risk
@@ -506,7 +637,11 @@ class BehaviorConstraints:
             
             # Record in history
             with self.history_lock:
+                latest = max(ctx.timestamp for ctx in context.values())
+                if self._history_times:
+                    latest = max(latest, self._history_times[-1])
                 self.operation_history.append(intent)
+                self._history_times.append(latest)
             
             return intent
             
@@ -520,7 +655,7 @@ class BehaviorConstraints:
         permissions: Set[str]
     ) -> str:
         """Determine security level based on intent and permissions"""
-        if intent_type in {IntentType.EXECUTE, IntentType.INSTALL}:
+        if intent_type in _ELEVATED_INTENTS:
             return 'HIGH'
         if 'MODIFY' in permissions:
             return 'MODERATE'
@@ -538,28 +673,22 @@ class BehaviorConstraints:
         risk_score = 0
         
         # Base risk from intent type
-        base_risks = {
-            IntentType.READ: 0,
-            IntentType.SUGGEST: 1,
-            IntentType.MODIFY: 2,
-            IntentType.EXECUTE: 3,
-            IntentType.INSTALL: 3
-        }
-        risk_score += base_risks[intent_type]
+        risk_score += _BASE_RISKS[intent_type]
         
         # Risk from context
-        if context.get(ContextType.CODE_CONTEXT):
-            risk_score = max(risk_score, context[ContextType.CODE_CONTEXT].risk_level.value)
+        code_context = context.get(ContextType.CODE_CONTEXT)
+        if code_context:
+            risk_score = max(risk_score, code_context.risk_level.value)
         
-        if context.get(ContextType.SECURITY_CONTEXT):
-            risk_score = max(risk_score, context[ContextType.SECURITY_CONTEXT].risk_level.value)
+        security_context = context.get(ContextType.SECURITY_CONTEXT)
+        if security_context:
+            risk_score = max(risk_score, security_context.risk_level.value)
         
         # Risk from permissions
-        high_risk_perms = {'EXECUTE', 'MODIFY_SYSTEM', 'INSTALL'}
-        if any(p in high_risk_perms for p in permissions):
+        if not _HIGH_RISK_PERMISSIONS.isdisjoint(permissions):
             risk_score += 1
         
-        return RiskLevel(min(risk_score, 4))
+        return _RISK_LEVELS[min(risk_score, 4)]
 
     def get_operation_history(
         self,
@@ -569,8 +698,15 @@ class BehaviorConstraints:
         """Get operation history filtered by time and intent type"""
         with self.history_lock:
             cutoff = datetime.now() - timedelta(minutes=minutes)
+            # Walk back only over the suffix that can have recent contexts
+            recent = []
+            for intent, latest in zip(reversed(self.operation_history), reversed(self._history_times)):
+                if latest <= cutoff:
+                    break
+                recent.append(intent)
+            recent.reverse()
             return [
-                intent for intent in self.operation_history
+                intent for intent in recent
                 if (intent_types is None or intent.intent_type in intent_types) and
                 any(ctx.timestamp > cutoff for ctx in intent.context.values())
             ]
@@ -3,6 +3,9 @@ SafeAI CodeGuard Protocol - Dynamic Control System
 Implements real-time monitoring, resource limits, rate limiting, and rollback capabilities.
 """
 
+import errno
+import fcntl
+import os
 import time
 import threading
 import queue
@@ -10,15 +13,50 @@ import logging
 import psutil
 import resource
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Set, Callable, Any
+from typing import Deque, Dict, Iterator, List, Optional, Set, Callable, Any
 from enum import Enum, auto
 from datetime import datetime, timedelta
 import json
 from pathlib import Path
 import shutil
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from collections import deque
+from itertools import takewhile
 from ..core.error import ResourceLimitError
 
+try:
+    import blake3  # SIMD BLAKE3 hashing for snapshot files, optional
+except ImportError:
+    blake3 = None
+
+# Snapshot file digests use BLAKE3 when available. SHA-256 is the fallback:
+# OpenSSL runs it on SHA-NI where the CPU has it, ahead of the other stdlib hashes.
+_HASH_ALGORITHM = "blake3" if blake3 is not None else "sha256"
+
+# Bytes read at a time when copying and hashing snapshot files
+_CHUNK_SIZE = 1 << 20
+
+# Linux ioctl making one file a copy-on-write clone of another (FICLONE)
+_FICLONE = 0x40049409
+
+# Errors meaning the filesystem can't clone files at all
+_NO_CLONE_ERRNOS = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS}
+
+# Rate limiter buckets count in units of 1/60e9 of a token, so a nanosecond
+# of refill adds exactly operations_per_minute units and no partial token
+# is ever rounded away
+_UNITS_PER_TOKEN = 60 * 10**9
+
+# Snapshots of fewer files than this are backed up without a thread pool
+_MIN_PARALLEL_FILES = 8
+
+# A file modified this close to a snapshot may be modified again within the
+# same filesystem timestamp tick, so an unchanged size and mtime don't prove
+# it unchanged
+_RACY_WINDOW_NS = 2 * 10**9
+
 class ResourceType(Enum):
     """Types of resources to monitor"""
     CPU = auto()
@@ -59,9 +97,10 @@ class RateLimit:
 class Snapshot:
     """System state snapshot for rollback"""
     timestamp: datetime
-    files: Dict[str, bool]  # path -> exists
+    files: Dict[str, str]  # path -> content digest
     resource_usage: Dict[ResourceType, float]
     metadata: Dict[str, Any]
+    hash_algorithm: str = "sha256"  # Algorithm of the file digests
 
 
 class ResourceMonitor:
@@ -72,6 +111,38 @@ class ResourceMonitor:
         self._last_network = psutil.net_io_counters()
         self._last_disk = psutil.disk_io_counters()
         self._last_check = time.time()
+        # Arm the non-blocking CPU sampling in sample_all
+        self.process.cpu_percent(interval=None)
+
+    def sample_all(self) -> Dict[ResourceType, float]:
+        """Sample every resource at once.
+
+        CPU usage is averaged since the previous sample instead of blocking
+        to measure it, and disk and network rates share one time interval.
+        """
+        now = time.time()
+        disk = psutil.disk_io_counters()
+        network = psutil.net_io_counters()
+        time_diff = now - self._last_check
+
+        disk_bytes = (
+            (disk.read_bytes + disk.write_bytes) -
+            (self._last_disk.read_bytes + self._last_disk.write_bytes)
+        )
+        network_bytes = (
+            (network.bytes_sent + network.bytes_recv) -
+            (self._last_network.bytes_sent + self._last_network.bytes_recv)
+        )
+        self._last_disk = disk
+        self._last_network = network
+        self._last_check = now
+
+        return {
+            ResourceType.CPU: self.process.cpu_percent(interval=None),
+            ResourceType.MEMORY: self.process.memory_info().rss / 1024 / 1024,
+            ResourceType.DISK: disk_bytes / time_diff / 1024 / 1024,
+            ResourceType.NETWORK: network_bytes / time_diff / 1024 / 1024
+        }
 
     def get_cpu_usage(self) -> float:
         """Get CPU usage percentage"""
@@ -117,33 +188,90 @@ class RateLimiter:
 
     def __init__(self, rate_limit: RateLimit):
         self.rate_limit = rate_limit
-        self.tokens = rate_limit.burst_limit
-        self.last_update = time.time()
+        self._capacity = rate_limit.burst_limit * _UNITS_PER_TOKEN
+        self._units = self._capacity
+        self.last_update = time.monotonic_ns()
         self.lock = threading.Lock()
+        # Units replenished per nanosecond
+        self._refill_rate = rate_limit.operations_per_minute
+
+    @property
+    def tokens(self) -> float:
+        """Tokens in the bucket as of the last acquire, including partial ones"""
+        return self._units / _UNITS_PER_TOKEN
 
     def try_acquire(self) -> bool:
         """Try to acquire a token. Returns True if successful."""
+        # Only the bucket update needs the lock, so the clock is read before it
+        now = time.monotonic_ns()
         with self.lock:
-            now = time.time()
-            # Replenish tokens
-            time_passed = now - self.last_update
-            new_tokens = int(time_passed * (self.rate_limit.operations_per_minute / 60))
-            self.tokens = min(
-                self.rate_limit.burst_limit,
-                self.tokens + new_tokens
-            )
-            self.last_update = now
-
-            if self.tokens > 0:
-                self.tokens -= 1
+            # Replenish tokens. A caller that read the clock before the last
+            # update gets none, rather than moving last_update backwards.
+            if now > self.last_update:
+                self._units = min(
+                    self._capacity,
+                    self._units + (now - self.last_update) * self._refill_rate
+                )
+                self.last_update = now
+
+            if self._units >= _UNITS_PER_TOKEN:
+                self._units -= _UNITS_PER_TOKEN
                 return True
             return False
 
     def get_wait_time(self) -> float:
         """Get estimated wait time in seconds until next token"""
-        if self.tokens > 0:
+        missing = _UNITS_PER_TOKEN - self._units
+        if missing <= 0:
             return 0
-        return (60 / self.rate_limit.operations_per_minute)
+        return missing / self._refill_rate / 1e9
+
+
+def _iter_files(root: Path) -> Iterator[str]:
+    """Yield the paths of files under root, relative to it.
+
+    Like rglob, symlinked directories are not descended into and unreadable
+    ones are skipped. .snapshots directories are pruned without being read.
+    """
+    stack = [("", str(root))]
+    while stack:
+        prefix, path = stack.pop()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    rel_path = prefix + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != ".snapshots":
+                            stack.append((rel_path + os.sep, entry.path))
+                    elif entry.is_file():
+                        yield rel_path
+        except PermissionError:
+            continue
+
+
+def _new_hasher():
+    """Create a hasher for snapshot file digests"""
+    return blake3.blake3() if blake3 is not None else hashlib.sha256()
+
+
+def _hash_file(path: Path) -> str:
+    """Hash a file the way snapshot files are hashed, in chunks"""
+    hasher = _new_hasher()
+    with open(path, "rb", buffering=0) as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _copy_and_hash(src: Path, dst: Path) -> str:
+    """Copy src to dst like shutil.copy2, hashing the bytes on the way"""
+    hasher = _new_hasher()
+    with open(src, "rb", buffering=0) as fsrc, open(dst, "wb") as fdst:
+        for chunk in iter(lambda: fsrc.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            fdst.write(chunk)
+    shutil.copystat(src, dst)
+    return hasher.hexdigest()
 
 
 class SnapshotManager:
@@ -153,6 +281,11 @@ class SnapshotManager:
         self.base_dir = Path(base_dir)
         self.snapshots_dir = self.base_dir / ".snapshots"
         self.snapshots_dir.mkdir(exist_ok=True)
+        # Digests of the last snapshot's files, keyed by their stat. One
+        # cache per algorithm, so digests of different algorithms never mix.
+        self.digest_cache_path = self.snapshots_dir / f"digests_{_HASH_ALGORITHM}.json"
+        # Cleared once the filesystem turns out not to support cloning
+        self._can_clone = True
         self.resource_monitor = ResourceMonitor()
 
     def create_snapshot(self, metadata: Dict[str, Any] = None) -> Snapshot:
@@ -160,27 +293,34 @@ class SnapshotManager:
         snapshot = Snapshot(
             timestamp=datetime.now(),
             files={},
-            resource_usage={
-                ResourceType.CPU: self.resource_monitor.get_cpu_usage(),
-                ResourceType.MEMORY: self.resource_monitor.get_memory_usage(),
-                ResourceType.DISK: self.resource_monitor.get_disk_usage(),
-                ResourceType.NETWORK: self.resource_monitor.get_network_usage()
-            },
-            metadata=metadata or {}
+            resource_usage=self.resource_monitor.sample_all(),
+            metadata=metadata or {},
+            hash_algorithm=_HASH_ALGORITHM
         )
 
         # Create backup directory for this snapshot
         backup_dir = self.snapshots_dir / f"backup_{snapshot.timestamp.isoformat()}"
         backup_dir.mkdir(parents=True, exist_ok=True)
 
-        # Store files and create backups
-        for file_path in self.base_dir.rglob("*"):
-            if file_path.is_file() and ".snapshots" not in str(file_path):
-                rel_path = file_path.relative_to(self.base_dir)
-                backup_path = backup_dir / rel_path
-                backup_path.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(str(file_path), str(backup_path))
-                snapshot.files[str(rel_path)] = True
+        # Store files and create backups. Copying and hashing release the
+        # GIL, so larger trees are spread over a thread pool.
+        rel_paths = list(_iter_files(self.base_dir))
+        backup = partial(self._backup_file, backup_dir, self._load_digest_cache())
+        workers = min(os.cpu_count() or 1, len(rel_paths))
+        if workers < 2 or len(rel_paths) < _MIN_PARALLEL_FILES:
+            entries = list(map(backup, rel_paths))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                entries = list(executor.map(backup, rel_paths))
+
+        new_cache = dict(zip(rel_paths, entries))
+        snapshot.files = {rel_path: entry[3] for rel_path, entry in new_cache.items()}
+        # A file modified just before this snapshot could change again unseen
+        # within a timestamp tick, so its digest is not reused
+        racy_after = int(snapshot.timestamp.timestamp() * 1e9) - _RACY_WINDOW_NS
+        self._save_digest_cache({
+            rel_path: entry for rel_path, entry in new_cache.items() if entry[2] < racy_after
+        })
 
         # Save snapshot
         snapshot_path = self.snapshots_dir / f"snapshot_{snapshot.timestamp.isoformat()}.json"
@@ -189,11 +329,66 @@ class SnapshotManager:
                 "timestamp": snapshot.timestamp.isoformat(),
                 "files": snapshot.files,
                 "resource_usage": {k.name: v for k, v in snapshot.resource_usage.items()},
-                "metadata": snapshot.metadata
+                "metadata": snapshot.metadata,
+                "hash_algorithm": snapshot.hash_algorithm
             }, f, indent=2)
 
         return snapshot
 
+    def _backup_file(self, backup_dir: Path, digest_cache: Dict[str, list], rel_path: str) -> list:
+        """Back up one file, returning its digest cache entry"""
+        file_path = self.base_dir / rel_path
+        backup_path = backup_dir / rel_path
+        backup_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Files unchanged since the last snapshot keep their digest and share
+        # its backup. Backups are never written to, so hardlinking them is
+        # safe, unlike hardlinking the files themselves.
+        stat = file_path.stat()
+        key = [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+        cached = digest_cache.get(rel_path)
+        if cached is not None and cached[:3] == key:
+            try:
+                os.link(self.snapshots_dir / cached[4] / rel_path, backup_path)
+            except (IndexError, OSError):
+                shutil.copy2(str(file_path), str(backup_path))
+            return key + [cached[3], backup_dir.name]
+
+        # Otherwise clone the file where the filesystem can, then hash the clone
+        if self._can_clone and self._clone_file(file_path, backup_path):
+            return key + [_hash_file(backup_path), backup_dir.name]
+        return key + [_copy_and_hash(file_path, backup_path), backup_dir.name]
+
+    def _clone_file(self, src: Path, dst: Path) -> bool:
+        """Make dst a copy-on-write clone of src, like cp --reflink=auto"""
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError as e:
+            if e.errno in _NO_CLONE_ERRNOS:
+                self._can_clone = False
+            return False
+        shutil.copystat(src, dst)
+        return True
+
+    def _load_digest_cache(self) -> Dict[str, list]:
+        """Load the digest cache, starting afresh if it is missing or unreadable"""
+        try:
+            with open(self.digest_cache_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable digest cache {self.digest_cache_path}: {str(e)}")
+            return {}
+
+    def _save_digest_cache(self, cache: Dict[str, list]):
+        """Save the digest cache, replacing any earlier one atomically"""
+        tmp_path = self.digest_cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.digest_cache_path)
+
     def get_snapshots(self) -> List[Snapshot]:
         """Get list of available snapshots"""
         snapshots = []
@@ -206,7 +401,8 @@ class SnapshotManager:
                     resource_usage={
                         ResourceType[k]: v for k, v in data["resource_usage"].items()
                     },
-                    metadata=data["metadata"]
+                    metadata=data["metadata"],
+                    hash_algorithm=data.get("hash_algorithm", "sha256")
                 ))
         return sorted(snapshots, key=lambda s: s.timestamp)
 
@@ -219,28 +415,65 @@ class SnapshotManager:
 
         try:
             # Remove files that didn't exist in snapshot
-            for file_path in self.base_dir.rglob("*"):
-                if file_path.is_file() and ".snapshots" not in str(file_path):
-                    rel_path = file_path.relative_to(self.base_dir)
-                    if str(rel_path) not in snapshot.files:
-                        file_path.unlink()
-
-            # Restore files from backup
-            for rel_path in snapshot.files:
+            added = [
+                rel_path for rel_path in _iter_files(self.base_dir)
+                if rel_path not in snapshot.files
+            ]
+            for rel_path in added:
+                (self.base_dir / rel_path).unlink()
+
+            # Restore files from backup, skipping those still unchanged
+            racy_after = int(snapshot.timestamp.timestamp() * 1e9) - _RACY_WINDOW_NS
+            for rel_path, digest in snapshot.files.items():
                 src_path = backup_dir / rel_path
                 dst_path = self.base_dir / rel_path
-                dst_path.parent.mkdir(parents=True, exist_ok=True)
-                if src_path.exists():
-                    shutil.copy2(str(src_path), str(dst_path))
-                else:
+                try:
+                    backup_stat = src_path.stat()
+                except FileNotFoundError:
                     logging.error(f"Backup file not found: {src_path}")
                     return False
+                if self._is_restored(dst_path, src_path, backup_stat, digest, snapshot, racy_after):
+                    continue
+                dst_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(str(src_path), str(dst_path))
 
             return True
         except Exception as e:
             logging.error(f"Error during rollback: {str(e)}")
             return False
 
+    def _is_restored(
+        self,
+        path: Path,
+        backup_path: Path,
+        backup_stat: os.stat_result,
+        digest: str,
+        snapshot: Snapshot,
+        racy_after: int
+    ) -> bool:
+        """Check whether a file already holds its backed-up content.
+
+        Backups keep the size and mtime of the file they copied, so a file
+        matching both is unchanged. The file is hashed only when its size
+        matches but that isn't enough to tell.
+        """
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size != backup_stat.st_size:
+            return False
+        if stat.st_mtime_ns == backup_stat.st_mtime_ns and backup_stat.st_mtime_ns < racy_after:
+            return True
+        # Snapshots from before digests, or with another algorithm, can't be compared
+        if snapshot.hash_algorithm != _HASH_ALGORITHM or not isinstance(digest, str):
+            return False
+        if _hash_file(path) != digest:
+            return False
+        # Same content; take the backup's times so the next rollback only stats it
+        shutil.copystat(str(backup_path), str(path))
+        return True
+
 
 class DynamicControlSystem:
     """Main system for dynamic control and monitoring"""
@@ -261,9 +494,9 @@ class DynamicControlSystem:
         self._monitor_thread = None
         self._running = False
         
-        # Resource usage history
-        self.usage_history: Dict[ResourceType, List[tuple[float, float]]] = {
-            rt: [] for rt in ResourceType
+        # Resource usage history, oldest first
+        self.usage_history: Dict[ResourceType, Deque[tuple[float, float]]] = {
+            rt: deque() for rt in ResourceType
         }
         self.history_lock = threading.Lock()
         
@@ -296,12 +529,7 @@ class DynamicControlSystem:
 
     def get_resource_usage(self) -> Dict[ResourceType, float]:
         """Get current resource usage"""
-        return {
-            ResourceType.CPU: self.resource_monitor.get_cpu_usage(),
-            ResourceType.MEMORY: self.resource_monitor.get_memory_usage(),
-            ResourceType.DISK: self.resource_monitor.get_disk_usage(),
-            ResourceType.NETWORK: self.resource_monitor.get_network_usage()
-        }
+        return self.resource_monitor.sample_all()
 
     def get_usage_history(self, resource_type: ResourceType, minutes: int = 1) -> List[tuple[float, float]]:
         """Get resource usage history for the specified time window
@@ -318,10 +546,13 @@ class DynamicControlSystem:
                 return []
                 
             cutoff = time.time() - (minutes * 60)
-            return [
-                (ts, usage) for ts, usage in self.usage_history[resource_type]
-                if ts >= cutoff
-            ]
+            # Entries are appended in time order, so the window is a suffix
+            recent = list(takewhile(
+                lambda entry: entry[0] >= cutoff,
+                reversed(self.usage_history[resource_type])
+            ))
+        recent.reverse()
+        return recent
 
     def create_snapshot(self, metadata: Optional[Dict[str, Any]] = None) -> Snapshot:
         """Create a new snapshot of the current state"""
@@ -337,12 +568,14 @@ class DynamicControlSystem:
 
     def _monitor_loop(self):
         """Main monitoring loop"""
-        while not self._stop_event.is_set():
+        while True:
             try:
                 self._check_resources()
-                time.sleep(1)  # Check every second
             except Exception as e:
                 logging.error(f"Error in monitoring loop: {e}")
+            # Check every second, waking at once when stopped
+            if self._stop_event.wait(1):
+                break
 
     def _check_resources(self):
         """Check system resource usage"""
@@ -351,14 +584,13 @@ class DynamicControlSystem:
 
         # Update history
         with self.history_lock:
+            cutoff = current_time - 3600
             for rt, usage in current_usage.items():
-                self.usage_history[rt].append((current_time, usage))
+                history = self.usage_history[rt]
+                history.append((current_time, usage))
                 # Keep last hour of data
-                cutoff = current_time - 3600
-                self.usage_history[rt] = [
-                    (ts, usage) for ts, usage in self.usage_history[rt]
-                    if ts >= cutoff
-                ]
+                while history[0][0] < cutoff:
+                    history.popleft()
 
         # Check limits with more frequent updates for CPU
         for limit in self.resource_limits:
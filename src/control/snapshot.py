@@ -38,10 +38,10 @@ class SnapshotManager:
         files = {}
         
         # Store current file states
-        for root, _, filenames in os.walk(self.base_dir):
-            if ".snapshots" in Path(root).parts:
-                continue
-                
+        for root, dirnames, filenames in os.walk(self.base_dir):
+            # Prune snapshot directories instead of walking them
+            dirnames[:] = [name for name in dirnames if name != ".snapshots"]
+
             for filename in filenames:
                 file_path = Path(root) / filename
                 rel_path = file_path.relative_to(self.base_dir)
@@ -6,6 +6,8 @@ Implements formal verification, test automation, compliance checking, and safety
 import ast
 import inspect
 import logging
+from functools import lru_cache
+from types import CodeType
 from typing import Dict, List, Optional, Set, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum, auto
@@ -41,7 +43,7 @@ class SafetyProperty:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class VerificationResult:
     """Result of a verification check"""
     success: bool
@@ -49,6 +51,15 @@ class VerificationResult:
     message: str
     details: Dict[str, Any] = field(default_factory=dict)
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert result to dictionary format"""
+        return {
+            'type': self.verification_type.name,
+            'success': self.success,
+            'message': self.message,
+            'details': self.details
+        }
+
 
 class FormalVerifier:
     """Implements formal verification methods"""
@@ -158,6 +169,12 @@ class FormalVerifier:
         return variables, constraints
 
 
+@lru_cache(maxsize=256)
+def _compile_expression(expression: str) -> CodeType:
+    """Compile a property expression once; plugins reuse the same strings"""
+    return compile(expression, '<safety>', 'eval')
+
+
 class PropertyValidator:
     """Validates safety properties in code"""
     
@@ -213,7 +230,7 @@ class PropertyValidator:
             
             # For other cases, evaluate the expression in the context of the code
             context = {"code": code}
-            return eval(prop.expression, {"__builtins__": {}}, context)
+            return eval(_compile_expression(prop.expression), {"__builtins__": {}}, context)
             
         except Exception as e:
             logging.error(f"Error checking invariant {prop.name}: {str(e)}")
@@ -84,6 +84,91 @@ class TestClass:
         self.assertEqual(context.context_type, ContextType.SECURITY_CONTEXT)
         self.assertEqual(len(context.data['permissions']), 2)
 
+    def test_runtime_context_snapshots_environment(self):
+        import pickle
+        from unittest import mock
+
+        analyzer = ContextAnalyzer()
+        with mock.patch.dict(os.environ, {"SACP_TEST_VAR": "before"}):
+            first = analyzer.analyze_runtime_context()
+            second = analyzer.analyze_runtime_context()
+            os.environ["SACP_TEST_VAR"] = "after"
+            third = analyzer.analyze_runtime_context()
+
+        # Unchanged environments share one snapshot; later changes get a new one
+        self.assertIs(first.data['env_vars'], second.data['env_vars'])
+        self.assertEqual(first.data['env_vars']["SACP_TEST_VAR"], "before")
+        self.assertEqual(third.data['env_vars']["SACP_TEST_VAR"], "after")
+        self.assertNotIn("SACP_TEST_VAR", os.environ)
+        self.assertEqual(pickle.loads(pickle.dumps(first)).data['env_vars'], first.data['env_vars'])
+
+    def test_code_context_reuses_parse(self):
+        from src.constraints.behavior import _parse_code
+
+        file_path = self.create_test_file("def f():\n    pass\n")
+        analyzer = ContextAnalyzer()
+        first = analyzer.analyze_code_context(file_path)
+
+        # An unchanged file is served from the parse cache
+        hits = _parse_code.cache_info().hits
+        second = analyzer.analyze_code_context(file_path)
+        self.assertEqual(_parse_code.cache_info().hits, hits + 1)
+        self.assertEqual(second.data, first.data)
+        self.assertIsNot(second.data['complexity'], first.data['complexity'])
+
+        # Editing the file invalidates its entry
+        self.create_test_file("import os\n\nclass A:\n    pass\n")
+        third = analyzer.analyze_code_context(file_path)
+        self.assertEqual(third.data['complexity']['classes'], 1)
+        self.assertEqual(third.data['imports'], ['os'])
+
+    def test_code_context_imports(self):
+        analyzer = ContextAnalyzer()
+        file_path = self.create_test_file(
+            "import json, os.path as p\nfrom posixpath import join\nfrom . import sibling\n"
+        )
+        context = analyzer.analyze_code_context(file_path)
+        self.assertEqual(sorted(context.data['imports']), ['.', 'json', 'os.path', 'posixpath'])
+        self.assertEqual(context.risk_level, RiskLevel.MODERATE)
+
+        # Risk follows the top-level module, not substrings of its name
+        file_path = self.create_test_file("from posixpath import join\nimport cosmos\n")
+        self.assertEqual(analyzer.analyze_code_context(file_path).risk_level, RiskLevel.MINIMAL)
+
+    def test_recent_activity_counts(self):
+        analyzer = ContextAnalyzer()
+
+        # More than 30 user operations within a minute raise the user risk
+        for _ in range(31):
+            context = analyzer.analyze_user_context("test_user", {})
+        self.assertEqual(context.risk_level, RiskLevel.MINIMAL)
+        context = analyzer.analyze_user_context("test_user", {})
+        self.assertEqual(context.risk_level, RiskLevel.MODERATE)
+
+        # High-risk security contexts count as recent violations
+        for expected in range(3):
+            context = analyzer.analyze_security_context({'EXECUTE'}, 'MINIMAL')
+            self.assertEqual(context.data['recent_violations'], expected)
+        analyzer.analyze_security_context({'READ'}, 'MODERATE')
+        context = analyzer.analyze_security_context({'READ'}, 'MODERATE')
+        self.assertEqual(context.data['recent_violations'], 3)
+
+        # Entries older than their window no longer count
+        analyzer._user_times[0] -= 61
+        self.assertEqual(analyzer._count_recent(analyzer._user_times, 60), 31)
+
+    def test_system_sample_reused_within_period(self):
+        from src.constraints.behavior import _sample_system
+
+        # Analyses within one sampling period share a single psutil reading
+        sample = _sample_system(-1)
+        self.assertIs(_sample_system(-1), sample)
+        self.assertIsNot(_sample_system(-2), sample)
+        self.assertEqual(
+            set(ContextAnalyzer().analyze_system_context().data),
+            {'cpu_percent', 'memory_percent', 'disk_usage', 'open_files'}
+        )
+
     def test_intent_validation(self):
         validator = IntentValidator()
         
@@ -135,6 +220,17 @@ class TestClass:
         
         self.assertFalse(validator.validate_intent(invalid_intent))
 
+    def test_code_context_stat_is_reused(self):
+        file_path = self.create_test_file("print('test')")
+        context = ContextAnalyzer().analyze_code_context(file_path)
+        self.assertEqual(context.metadata['stat'].st_size, os.stat(file_path).st_size)
+
+        # Paths already stat'ed are not checked for existence again
+        validator = IntentValidator()
+        missing = os.path.join(self.temp_dir, "missing.py")
+        self.assertFalse(validator._validate_paths([missing]))
+        self.assertTrue(validator._validate_paths([missing], {missing}))
+
     def test_behavior_constraints(self):
         # Create test file
         file_path = self.create_test_file("print('test')")
@@ -151,6 +247,8 @@ class TestClass:
         
         self.assertIsNotNone(read_intent)
         self.assertEqual(read_intent.intent_type, IntentType.READ)
+        # Every context of one intent carries the same timestamp
+        self.assertEqual(len({c.timestamp for c in read_intent.context.values()}), 1)
         
         # Test high-risk intent
         execute_intent = self.constraints.create_intent(
@@ -169,6 +267,31 @@ class TestClass:
         self.assertEqual(len(history), 1)  # Only the read intent
         self.assertEqual(history[0].intent_type, IntentType.READ)
 
+    def test_context_analyzer_is_shared(self):
+        self.assertIs(self.constraints.intent_validator.context_analyzer, self.constraints.context_analyzer)
+        self.assertIsInstance(IntentValidator().context_analyzer, ContextAnalyzer)
+
+    def test_operation_history_is_bounded(self):
+        constraints = BehaviorConstraints(max_history=2)
+        file_path = self.create_test_file("print('test')")
+
+        descriptions = [f"Read {i}" for i in range(3)]
+        for description in descriptions:
+            self.assertIsNotNone(constraints.create_intent(
+                intent_type=IntentType.READ,
+                description=description,
+                target_paths=[file_path],
+                required_permissions={'READ'},
+                user_id="test_user",
+                session_data={}
+            ))
+
+        # Only the newest intents are kept, oldest first
+        history = constraints.get_operation_history(minutes=5)
+        self.assertEqual([i.description for i in history], descriptions[1:])
+        self.assertEqual(constraints.get_operation_history(minutes=5, intent_types={IntentType.EXECUTE}), [])
+        self.assertEqual(constraints.get_operation_history(minutes=-1), [])
+
     def test_custom_validators(self):
         validator = IntentValidator()
         
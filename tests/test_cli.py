@@ -4,10 +4,15 @@ Tests for the SACP command-line interface
 
 import unittest
 import tempfile
+import io
+import os
+import threading
+from contextlib import redirect_stdout
 from pathlib import Path
 import json
 import yaml
-from datetime import datetime
+from datetime import date, datetime
+from unittest import mock
 
 from src.cli.main import CommandLineInterface, OutputFormat
 
@@ -16,6 +21,10 @@ class TestCommandLineInterface(unittest.TestCase):
     def setUp(self):
         self.cli = CommandLineInterface()
         self.temp_dir = tempfile.mkdtemp()
+        # Keep parsed --rules/--context files out of the user's real cache
+        env = mock.patch.dict(os.environ, {"SACP_YAML_CACHE_DIR": str(Path(self.temp_dir) / "cache")})
+        env.start()
+        self.addCleanup(env.stop)
 
     def tearDown(self):
         import shutil
@@ -154,6 +163,295 @@ class TestCommandLineInterface(unittest.TestCase):
         args = ["verify", str(test_file), "--format", "text"]
         self.cli.run(args)
 
+    def test_json_results_output(self):
+        test_file = self.create_test_file("import pickle\npickle.loads(data)\n")
+
+        # A binary-backed stdout takes the orjson path when it is installed
+        for output in (io.StringIO(), io.TextIOWrapper(io.BytesIO(), encoding="utf-8")):
+            with redirect_stdout(output):
+                self.cli.run(["check", str(test_file), "--format", "json"])
+            output.flush()
+            text = output.getvalue() if isinstance(output, io.StringIO) else output.buffer.getvalue().decode()
+
+            results = json.loads(text)["results"]
+            self.assertTrue(any("pickle" in r["message"].lower() for r in results))
+
+    def test_json_backends_match(self):
+        from src.cli import main as cli_main
+        from src.core.protocol import SafetyLevel
+
+        if cli_main.orjson is None:
+            self.skipTest("orjson is not installed")
+
+        def encode_both(data):
+            encoded = cli_main._encode_json(data)
+            with mock.patch.object(cli_main, "orjson", None):
+                return encoded, cli_main._encode_json(data)
+
+        samples = [
+            {"message": "Initialized SACP in /tmp/проект ✓"},
+            {"results": [{"line": 3, "details": {}, "tags": []}], "ratio": 0.5},
+            {"floats": [0.1, -2.5, 1234.5678, 1e15, 0.0001, 3.0]},
+            {"nan": float("nan"), "inf": [float("inf"), float("-inf")]},
+            {2: float("nan")},
+            {"file": "bad\udcff name", "note": "проект"},
+            {"at": datetime(2024, 1, 2, 3, 4, 5, 6), "on": date(2024, 1, 2)},
+            {1: "one", None: "none", True: "yes"},
+            {"level": SafetyLevel.CONTROLLED, "nested": [[1, 2], {"a": None}]},
+        ]
+        for data in samples:
+            with self.subTest(data=data):
+                encoded, fallback = encode_both(data)
+                self.assertEqual(fallback, encoded)
+                json.loads(encoded)
+
+        # Floats in exponent form are spelled differently but parse the same
+        encoded, fallback = encode_both({"big": 1e16, "small": 1e-7})
+        self.assertEqual(json.loads(fallback), json.loads(encoded))
+
+        # Lone surrogates come out escaped rather than failing to encode
+        encoded, _ = encode_both({"file": "bad\udcff"})
+        self.assertEqual(json.loads(encoded), {"file": "bad\udcff"})
+
+    def test_verification_results_output(self):
+        from src.verification.safety import VerificationResult, VerificationType
+
+        results = [VerificationResult(False, VerificationType.COMPLIANCE, "Violations found", {"count": 2})]
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.cli.result_writers[OutputFormat.JSON](results)
+
+        self.assertEqual(json.loads(output.getvalue())["results"], [
+            {"type": "COMPLIANCE", "success": False, "message": "Violations found", "details": {"count": 2}}
+        ])
+
+    def test_check_directory(self):
+        project = Path(self.temp_dir) / "project"
+        for name in ("a.py", "pkg/b.py", "node_modules/dep/c.py", "target/d.py"):
+            (project / name).parent.mkdir(parents=True, exist_ok=True)
+            (project / name).write_text("import os\nos.system(cmd)\n")
+        rules = {"no_shell": {"pattern": r"os\.system\("}}
+
+        results = self.cli._analyze_path(project, rules)
+
+        # Vendored and build output directories are never walked
+        flagged = {Path(r.file_path).name for r in results if r.metadata.get("rule_name") == "no_shell"}
+        self.assertEqual(flagged, {"a.py", "b.py"})
+
+    def test_text_results_output(self):
+        test_file = self.create_test_file("import pickle\npickle.loads(data)\n")
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.cli.run(["check", str(test_file), "--format", "text"])
+
+        text = output.getvalue()
+        self.assertTrue(text.startswith("\nResults:\n" + "-" * 50 + "\n"))
+        self.assertIn("  Message: B301", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_analyzers_built_on_demand(self):
+        # Printing help must not pay for analyzers no command asked for
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(self.cli.run([]), 1)
+        self.assertNotIn("security_analyzer", vars(self.cli))
+        self.assertNotIn("safety_verification", vars(self.cli))
+
+    def test_yaml_imported_on_demand(self):
+        import subprocess
+        import sys
+
+        # A fresh interpreter, since this one already imported yaml for the tests
+        probe = (
+            "import sys; from src.cli.main import CommandLineInterface; "
+            "CommandLineInterface().run(sys.argv[1:]); print('yaml' in sys.modules)"
+        )
+        for args, imported in ((["init", "--path", self.temp_dir, "--format", "json"], "False"),
+                               (["init", "--path", self.temp_dir, "--format", "yaml"], "True")):
+            out = subprocess.run([sys.executable, "-c", probe, *args],
+                                 capture_output=True, text=True, check=True).stdout
+            self.assertEqual(out.splitlines()[-1], imported)
+
+    def test_daemon_runs_commands(self):
+        from src.cli.daemon import CLIDaemon, request
+
+        socket_path = str(Path(self.temp_dir) / "sacp.sock")
+        # No daemon yet: callers fall back to running in-process
+        self.assertIsNone(request(["--help"], socket_path))
+
+        daemon = CLIDaemon(socket_path)
+        server = threading.Thread(target=daemon.serve_forever, daemon=True)
+        server.start()
+        try:
+            code, out, err = request(
+                ["init", "--path", self.temp_dir, "--format", "json"], socket_path
+            )
+            self.assertEqual(code, 0)
+            self.assertIn("Initialized SACP", json.loads(out)["message"])
+            self.assertTrue((Path(self.temp_dir) / ".sacp.json").exists())
+
+            code, out, err = request(["verify", "non_existent.py"], socket_path)
+            self.assertEqual(code, 1)
+            self.assertIn("does not exist", err)
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+        self.assertFalse(Path(socket_path).exists())
+
+    def test_daemon_adopts_client_environment(self):
+        import socket
+        from src.cli.daemon import CLIDaemon, _recv, _send
+
+        socket_path = str(Path(self.temp_dir) / "sacp.sock")
+        rules_file = self.create_config_file({"security_rules": {}})
+        source = self.create_test_file("x = 1\n")
+        client_cache = Path(self.temp_dir) / "client_cache"
+
+        daemon = CLIDaemon(socket_path)
+        server = threading.Thread(target=daemon.serve_forever, daemon=True)
+        server.start()
+        try:
+            daemon_env = dict(os.environ)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+                _send(sock, {
+                    "argv": ["check", str(source), "--rules", str(rules_file)],
+                    "cwd": self.temp_dir,
+                    "env": dict(daemon_env, SACP_YAML_CACHE_DIR=str(client_cache)),
+                })
+                self.assertEqual(_recv(sock)["code"], 0)
+            # The parsed rules were cached where the client's environment says
+            self.assertEqual(len(list(client_cache.glob("*.json"))), 1)
+            self.assertEqual(dict(os.environ), daemon_env)
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+    def test_daemon_spawn(self):
+        import subprocess
+        import time
+        from src.cli import daemon as cli_daemon
+
+        socket_path = str(Path(self.temp_dir) / "sacp.sock")
+        with mock.patch.object(cli_daemon.subprocess, "Popen") as popen:
+            self.assertTrue(cli_daemon.spawn(socket_path))
+            # Attempts back off while the first daemon comes up
+            self.assertFalse(cli_daemon.spawn(socket_path))
+        popen.assert_called_once()
+        args, kwargs = popen.call_args
+
+        # The recorded command starts a working daemon from any directory
+        process = subprocess.Popen(args[0], env=kwargs["env"], cwd=tempfile.gettempdir(),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 30
+            response = None
+            while response is None and time.monotonic() < deadline:
+                time.sleep(0.05)
+                response = cli_daemon.request(["--help"], socket_path)
+            self.assertIsNotNone(response)
+        finally:
+            process.terminate()
+            process.wait()
+
+        # Failures to launch are reported rather than swallowed
+        other_path = str(Path(self.temp_dir) / "other.sock")
+        with mock.patch.object(cli_daemon.subprocess, "Popen", side_effect=OSError("no python")), \
+                self.assertLogs("src.cli.daemon", level="WARNING"):
+            self.assertFalse(cli_daemon.spawn(other_path))
+
+    def test_daemon_socket_must_be_trusted(self):
+        from src.core import __version__
+        from src.cli import daemon as cli_daemon
+
+        runtime_dir = Path(self.temp_dir) / "runtime"
+        with mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": str(runtime_dir)}):
+            os.environ.pop("SACP_DAEMON_SOCKET", None)
+            default_path = Path(cli_daemon.socket_path())
+        self.assertEqual(default_path.parent, runtime_dir / "sacp")
+        self.assertIn(__version__, default_path.name)
+
+        # Directories others can enter are refused by both ends
+        shared_dir = Path(self.temp_dir) / "shared"
+        shared_dir.mkdir()
+        shared_dir.chmod(0o755)
+        with self.assertRaises(RuntimeError):
+            cli_daemon.CLIDaemon(str(shared_dir / "sacp.sock"))
+
+        socket_path = str(Path(self.temp_dir) / "sacp.sock")
+        daemon = cli_daemon.CLIDaemon(socket_path)
+        server = threading.Thread(target=daemon.serve_forever, daemon=True)
+        server.start()
+        try:
+            Path(self.temp_dir).chmod(0o755)
+            self.assertIsNone(cli_daemon.request(["--help"], socket_path))
+            Path(self.temp_dir).chmod(0o700)
+            self.assertIsNotNone(cli_daemon.request(["--help"], socket_path))
+
+            # So is a daemon running as another user
+            with mock.patch.object(cli_daemon, "_peer_uid", return_value=os.getuid() + 1):
+                with self.assertLogs("src.cli.daemon", level="WARNING"):
+                    self.assertIsNone(cli_daemon.request(["--help"], socket_path))
+        finally:
+            daemon.shutdown()
+            daemon.server_close()
+
+    def test_yaml_parse_cache(self):
+        from src.cli.yaml_cache import load_cached
+
+        cache_dir = Path(self.temp_dir) / "yaml_cache"
+        config_file = self.create_config_file({"rules": ["no_eval"]})
+        self.assertEqual(load_cached(config_file, cache_dir), {"rules": ["no_eval"]})
+
+        # Unchanged files are served from their cached parse, stored as JSON
+        (entry,) = cache_dir.glob("*.json")
+        entry.write_text(json.dumps({"rules": ["from_cache"]}))
+        self.assertEqual(load_cached(config_file, cache_dir), {"rules": ["from_cache"]})
+
+        # An entry that doesn't decode is a miss, and is replaced
+        entry.write_bytes(b"\x80\x04not json")
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(load_cached(config_file, cache_dir), {"rules": ["no_eval"]})
+        self.assertEqual(json.loads(entry.read_text()), {"rules": ["no_eval"]})
+
+        # Edited files are parsed again
+        config_file = self.create_config_file({"rules": ["no_exec"]})
+        self.assertEqual(load_cached(config_file, cache_dir), {"rules": ["no_exec"]})
+
+        # Parses JSON can't hold exactly are returned but never cached
+        config_file = self.create_config_file({"since": date(2024, 1, 2), 1: "one"})
+        self.assertEqual(load_cached(config_file, cache_dir), {"since": date(2024, 1, 2), 1: "one"})
+        self.assertEqual(len(list(cache_dir.glob("*.json"))), 2)
+
+    def test_fast_path_matches_argparse(self):
+        from src.cli.main import _fast_parse
+
+        source = str(self.create_test_file("x = 1\n"))
+        config = str(self.create_config_file({}))
+        common = [
+            ["init"],
+            ["init", "--path", self.temp_dir, "--safety-level", "RESTRICTED", "--format", "json"],
+            ["verify", source, "--compliance-level", "STRICT", "--config", config],
+            ["check", "--format", "yaml", source, "--rules", config],
+            ["analyze", source, "--context", config],
+        ]
+        for args in common:
+            self.assertEqual(_fast_parse(args), self.cli.parser.parse_args(args))
+
+        # Handlers get resolved paths and enum members rather than strings
+        parsed = _fast_parse(common[2])
+        self.assertEqual(parsed.path, Path(source).resolve())
+        self.assertEqual(parsed.compliance_level.name, "STRICT")
+
+        # The argparse tree is built once and shared by every instance
+        self.assertIs(CommandLineInterface().parser, self.cli.parser)
+
+        # Help, errors and unusual shapes are left to argparse
+        for args in (["--help"], ["verify"], ["init", "x"], ["check", source, "--format", "xml"],
+                     ["verify", source, "--format"], ["init", "--path=proj"],
+                     ["check", "missing.py"], ["init", "--safety-level", "UNKNOWN"]):
+            self.assertIsNone(_fast_parse(args))
+
     def test_error_handling(self):
         # Test non-existent file
         args = ["verify", "non_existent.py"]
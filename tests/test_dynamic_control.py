@@ -75,6 +75,60 @@ class TestDynamicControl(unittest.TestCase):
         history = self.control_system.get_usage_history(ResourceType.CPU, minutes=1)
         self.assertGreater(len(history), 0)
 
+    def test_stop_interrupts_monitor_wait(self):
+        self.control_system.start()
+        time.sleep(0.2)
+
+        # The monitor thread is between checks and exits without finishing its wait
+        started = time.monotonic()
+        self.control_system.stop()
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertFalse(self.control_system._monitor_thread.is_alive())
+
+    def test_sample_all(self):
+        from types import SimpleNamespace
+        from unittest import mock
+
+        monitor = ResourceMonitor()
+        monitor._last_check = 100.0
+        monitor._last_disk = SimpleNamespace(read_bytes=0, write_bytes=0)
+        monitor._last_network = SimpleNamespace(bytes_sent=0, bytes_recv=0)
+        disk = SimpleNamespace(read_bytes=2 * 1024 * 1024, write_bytes=2 * 1024 * 1024)
+        network = SimpleNamespace(bytes_sent=1024 * 1024, bytes_recv=1024 * 1024)
+
+        # One reading of each counter, with both rates over the same interval
+        with mock.patch("src.control.dynamic.time.time", return_value=102.0), \
+                mock.patch("src.control.dynamic.psutil.disk_io_counters", return_value=disk) as disk_io, \
+                mock.patch("src.control.dynamic.psutil.net_io_counters", return_value=network) as net_io:
+            usage = monitor.sample_all()
+        self.assertEqual(disk_io.call_count + net_io.call_count, 2)
+        self.assertEqual(usage[ResourceType.DISK], 2.0)
+        self.assertEqual(usage[ResourceType.NETWORK], 1.0)
+        self.assertGreater(usage[ResourceType.MEMORY], 0)
+        self.assertEqual(monitor._last_check, 102.0)
+
+    def test_usage_history_window(self):
+        from unittest import mock
+
+        now = time.time()
+        history = self.control_system.usage_history[ResourceType.CPU]
+        history.extend([(now - 4000, 1.0), (now - 100, 2.0), (now - 10, 3.0)])
+
+        # Windows are served newest-last, without entries older than asked for
+        self.assertEqual(self.control_system.get_usage_history(ResourceType.CPU, minutes=1), [(now - 10, 3.0)])
+        self.assertEqual(
+            self.control_system.get_usage_history(ResourceType.CPU, minutes=2),
+            [(now - 100, 2.0), (now - 10, 3.0)]
+        )
+
+        # Each check appends one sample and drops those older than an hour
+        usage = {rt: 0.0 for rt in ResourceType}
+        with mock.patch.object(self.control_system, "get_resource_usage", return_value=usage):
+            self.control_system._check_resources()
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history[0], (now - 100, 2.0))
+        self.assertEqual(history[-1][1], 0.0)
+
     def test_rate_limiting(self):
         limiter = RateLimiter(self.rate_limit)
         
@@ -88,6 +142,32 @@ class TestDynamicControl(unittest.TestCase):
         # Should have non-zero wait time
         self.assertGreater(limiter.get_wait_time(), 0)
 
+    def test_rate_limiter_stale_clock(self):
+        from unittest import mock
+
+        limiter = RateLimiter(self.rate_limit)
+        last_update = limiter.last_update
+
+        # A caller whose clock reading predates the last update neither
+        # loses tokens nor moves the bucket back in time
+        with mock.patch("src.control.dynamic.time.monotonic_ns", return_value=last_update - 5 * 10**9):
+            self.assertTrue(limiter.try_acquire())
+        self.assertEqual(limiter.last_update, last_update)
+        self.assertEqual(limiter.tokens, self.rate_limit.burst_limit - 1)
+
+    def test_rate_limiter_partial_tokens(self):
+        from unittest import mock
+
+        # Calls closer together than one token's refill still add up to it
+        times = [0, 0, 500_000_000, 1_000_000_000]
+        with mock.patch("src.control.dynamic.time.monotonic_ns", side_effect=times):
+            limiter = RateLimiter(RateLimit(operations_per_minute=60, burst_limit=1))
+            self.assertTrue(limiter.try_acquire())
+            self.assertFalse(limiter.try_acquire())
+            self.assertEqual(limiter.tokens, 0.5)
+            self.assertAlmostEqual(limiter.get_wait_time(), 0.5)
+            self.assertTrue(limiter.try_acquire())
+
     def test_snapshot_management(self):
         # Create test file
         test_file = Path("test.txt")
@@ -105,6 +185,165 @@ class TestDynamicControl(unittest.TestCase):
         # Verify
         self.assertEqual(test_file.read_text(), "test content")
 
+    def test_snapshot_digests(self):
+        import hashlib
+        from src.control import dynamic
+
+        def digest(data):
+            if dynamic.blake3 is not None:
+                return dynamic.blake3.blake3(data).hexdigest()
+            return hashlib.sha256(data).hexdigest()
+
+        manager = SnapshotManager(self.temp_dir)
+        test_file = Path("test.txt")
+        test_file.write_text("test content")
+        # Files modified just before a snapshot are always hashed again
+        racy = manager.create_snapshot()
+        self.assertEqual(racy.files["test.txt"], digest(b"test content"))
+        self.assertEqual(json.loads(manager.digest_cache_path.read_text()), {})
+
+        past = time.time() - 60
+        os.utime(test_file, (past, past))
+        snapshot = manager.create_snapshot()
+        self.assertEqual(snapshot.files["test.txt"], digest(b"test content"))
+        self.assertEqual(manager.get_snapshots()[-1].hash_algorithm, snapshot.hash_algorithm)
+
+        # Unchanged files take their digest from the cache without rehashing
+        cache = json.loads(manager.digest_cache_path.read_text())
+        cache["test.txt"][3] = "cached"
+        manager.digest_cache_path.write_text(json.dumps(cache))
+        self.assertEqual(manager.create_snapshot().files["test.txt"], "cached")
+
+        # Edited files are hashed again
+        test_file.write_text("modified content!")
+        self.assertEqual(
+            manager.create_snapshot().files["test.txt"],
+            digest(b"modified content!")
+        )
+
+    def test_rollback_skips_unchanged_files(self):
+        from unittest import mock
+
+        manager = SnapshotManager(self.temp_dir)
+        past = time.time() - 60
+        for name in ("same.txt", "touched.txt", "edited.txt", "racy.txt"):
+            Path(name).write_text(f"{name} before")
+            os.utime(name, (past, past))
+        # Modified in the snapshot's own timestamp tick
+        os.utime("racy.txt", ns=(time.time_ns(),) * 2)
+        snapshot = manager.create_snapshot()
+
+        Path("touched.txt").touch()
+        Path("edited.txt").write_text("edited.txt after!")
+        racy_stat = os.stat("racy.txt")
+        Path("racy.txt").write_text("racy.txt AFTER!")
+        os.utime("racy.txt", ns=(racy_stat.st_atime_ns, racy_stat.st_mtime_ns))
+
+        # Files with their backup's stat, or only its content, are not copied
+        with mock.patch("src.control.dynamic.shutil.copy2", wraps=shutil.copy2) as copy2:
+            self.assertTrue(manager.rollback_to_snapshot(snapshot))
+        self.assertEqual(
+            sorted(Path(call.args[1]).name for call in copy2.call_args_list),
+            ["edited.txt", "racy.txt"]
+        )
+        for name in ("same.txt", "touched.txt", "edited.txt", "racy.txt"):
+            self.assertEqual(Path(name).read_text(), f"{name} before")
+        self.assertEqual(os.stat("touched.txt").st_mtime_ns, os.stat("same.txt").st_mtime_ns)
+
+    def test_snapshot_backups_are_shared(self):
+        test_file = Path("test.txt")
+        test_file.write_text("test content")
+        past = time.time() - 60
+        os.utime(test_file, (past, past))
+
+        # An unchanged file shares the previous snapshot's backup, never the file itself
+        manager = SnapshotManager(self.temp_dir)
+        first, second = manager.create_snapshot(), manager.create_snapshot()
+        backups = [
+            manager.snapshots_dir / f"backup_{snapshot.timestamp.isoformat()}" / "test.txt"
+            for snapshot in (first, second)
+        ]
+        self.assertEqual(backups[0].stat().st_ino, backups[1].stat().st_ino)
+        self.assertNotEqual(backups[0].stat().st_ino, test_file.stat().st_ino)
+        self.assertEqual(second.files, first.files)
+
+        # Editing the file in place leaves every backup intact
+        with open(test_file, "r+") as f:
+            f.write("TEST")
+        self.assertTrue(manager.rollback_to_snapshot(first))
+        self.assertEqual(test_file.read_text(), "test content")
+        self.assertEqual(backups[1].read_text(), "test content")
+
+    def test_snapshot_clones_files(self):
+        import errno
+        from unittest import mock
+
+        Path("test.txt").write_text("test content")
+        manager = SnapshotManager(self.temp_dir)
+
+        # Stand-in for a filesystem that clones: the ioctl copies the bytes
+        def clone(dst_fd, request, src_fd):
+            os.write(dst_fd, os.read(src_fd, 1 << 20))
+
+        with mock.patch("src.control.dynamic.fcntl.ioctl", side_effect=clone) as ioctl, \
+                mock.patch("src.control.dynamic._copy_and_hash") as copy_and_hash:
+            cloned = manager.create_snapshot()
+        self.assertEqual(ioctl.call_count, 1)
+        copy_and_hash.assert_not_called()
+
+        # Without clone support, files are copied and cloning is not tried again
+        manager.digest_cache_path.unlink()
+        unsupported = OSError(errno.EOPNOTSUPP, "Operation not supported")
+        with mock.patch("src.control.dynamic.fcntl.ioctl", side_effect=unsupported) as ioctl:
+            copied = manager.create_snapshot()
+            manager.digest_cache_path.unlink()
+            manager.create_snapshot()
+        self.assertEqual(ioctl.call_count, 1)
+        self.assertEqual(copied.files, cloned.files)
+
+    def test_snapshot_walk_prunes_snapshots(self):
+        from unittest import mock
+        from src.control.dynamic import _iter_files
+
+        for name in ("sub/z.txt", "sub/.snapshots/y.txt", "notes.snapshots.txt", "target/t.txt"):
+            Path(name).parent.mkdir(parents=True, exist_ok=True)
+            Path(name).write_text(name)
+        os.symlink("notes.snapshots.txt", "link.txt")
+        os.symlink("target", "linked_dir")
+        manager = SnapshotManager(self.temp_dir)
+        manager.create_snapshot()
+
+        # Files behind symlinks are kept, symlinked directories are not walked,
+        # and no .snapshots directory is ever listed
+        with mock.patch("src.control.dynamic.os.scandir", wraps=os.scandir) as scandir:
+            files = set(_iter_files(Path(self.temp_dir)))
+        self.assertEqual(files, {
+            os.path.join("sub", "z.txt"), "notes.snapshots.txt", "link.txt", os.path.join("target", "t.txt")
+        })
+        self.assertFalse([call for call in scandir.call_args_list if ".snapshots" in call.args[0]])
+
+    def test_snapshot_parallel_backup(self):
+        from unittest import mock
+
+        for i in range(20):
+            path = Path(f"pkg{i % 3}") / f"file{i}.txt"
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(f"content {i}")
+
+        # The thread pool backs up every file, in the same order as a serial run
+        manager = SnapshotManager(self.temp_dir)
+        serial = manager.create_snapshot()
+        manager.digest_cache_path.unlink()
+        with mock.patch("src.control.dynamic.os.cpu_count", return_value=4):
+            parallel = manager.create_snapshot()
+        self.assertEqual(len(parallel.files), 20)
+        self.assertEqual(list(parallel.files.items()), list(serial.files.items()))
+
+        for path in Path(".").glob("pkg*/file*.txt"):
+            path.write_text("changed")
+        self.assertTrue(manager.rollback_to_snapshot(parallel))
+        self.assertEqual(Path("pkg1/file4.txt").read_text(), "content 4")
+
     def test_control_actions(self):
         action_triggered = threading.Event()
         
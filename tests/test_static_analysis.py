@@ -2,11 +2,13 @@
 Tests for the SACP static analysis system
 """
 
+import mmap
 import unittest
 import pytest
 from pathlib import Path
 import tempfile
 from src.analyzers.static import (
+    PatternAnalyzer,
     SecurityAnalyzer,
     StyleAnalyzer,
     DependencyAnalyzer,
@@ -47,6 +49,63 @@ class TestStaticAnalysis(unittest.TestCase):
             f.write(content.strip())
         return file_path
 
+    def test_pattern_analysis(self):
+        """Test pattern matches report the right line and code"""
+        code = """
+import pickle
+
+def load(data):
+    token = "abc123"
+    print(data)
+    return pickle.loads(data)
+"""
+        file_path = self.create_test_file(code)
+        analyzer = PatternAnalyzer()
+        results = analyzer.analyze_file(file_path)
+
+        found = {r.metadata['pattern_name']: r for r in results}
+        self.assertEqual(found['hardcoded_secrets'].line_number, 4)
+        self.assertEqual(found['hardcoded_secrets'].code, 'token = "abc123"')
+        self.assertEqual(found['debug_code'].line_number, 5)
+        self.assertEqual(found['unsafe_pickle'].line_number, 6)
+        self.assertEqual(found['unsafe_pickle'].severity, Severity.ERROR)
+
+    def test_overlapping_patterns_all_report(self):
+        """Test patterns matching on the same line each report a finding"""
+        file_path = self.create_test_file('secret = "print(1)"\n')
+        results = PatternAnalyzer().analyze_file(file_path)
+
+        self.assertEqual(
+            sorted((r.metadata['pattern_name'], r.line_number) for r in results),
+            [('debug_code', 1), ('hardcoded_secrets', 1)]
+        )
+
+    def test_mapped_scan_matches_read_scan(self):
+        """Test large files scanned through mmap report what in-memory bytes do"""
+        from unittest import mock
+
+        code = b'Password = "abc"\nPRINT(x)\npickle.loads(d)\nPICKLE.LOADS(d)\n'
+        file_path = self.create_test_file(code.decode())
+        analyzer = PatternAnalyzer()
+        expected = analyzer.analyze_file(file_path, code)
+
+        with mock.patch('src.analyzers.static._MMAP_THRESHOLD', 0), \
+                mock.patch.object(analyzer, '_scan', wraps=analyzer._scan) as scan:
+            mapped = analyzer.analyze_file(file_path)
+        self.assertIsInstance(scan.call_args.args[1], mmap.mmap)
+        self.assertEqual(mapped, expected)
+        self.assertEqual(len(mapped), 3)
+
+    def test_pattern_case_sensitivity(self):
+        """Test case-insensitive patterns fold case while others stay exact"""
+        file_path = self.create_test_file('PASSWORD = "Hunter2"\nPICKLE.LOADS(data)\n')
+        results = PatternAnalyzer().analyze_file(file_path)
+
+        self.assertEqual(
+            [(r.metadata['pattern_name'], r.code) for r in results],
+            [('hardcoded_secrets', 'PASSWORD = "Hunter2"')]
+        )
+
     def test_security_analysis(self):
         """Test security analysis functionality"""
         # Create test file with security issues
@@ -68,6 +127,47 @@ def unsafe_function():
         self.assertGreater(len(results), 0)
         self.assertTrue(any('pickle' in r.message.lower() for r in results))
 
+    def test_custom_security_rules(self):
+        """Test custom rules report each match with its rule and line"""
+        code = """
+import os
+result = eval("1")
+os.system("ls")
+"""
+        file_path = self.create_test_file(code)
+        rules = {
+            'no_eval': {'pattern': r'(eval|exec)\s*\(', 'description': 'No eval'},
+            'no_shell': {'pattern': r'os\.system\('}
+        }
+        analyzer = SecurityAnalyzer()
+
+        results = analyzer._apply_rules(file_path, rules)
+        found = sorted((r.line_number, r.metadata['rule_name'], r.code) for r in results)
+        self.assertEqual(found, [
+            (2, 'no_eval', 'result = eval("1")'),
+            (3, 'no_shell', 'os.system("ls")')
+        ])
+        self.assertEqual(results[0].message, 'No eval')
+
+        # Rules matching the same span each report it
+        overlapping = {
+            'no_eval': {'pattern': r'eval\('},
+            'no_eval_input': {'pattern': r'eval\("'},
+            'shell_true': {'pattern': r'os\.system'},
+            'subprocess_shell': {'pattern': r'os\.system\("ls'}
+        }
+        found = sorted((r.line_number, r.metadata['rule_name']) for r in analyzer._apply_rules(file_path, overlapping))
+        self.assertEqual(found, [(2, 'no_eval'), (2, 'no_eval_input'), (3, 'shell_true'), (3, 'subprocess_shell')])
+
+        # A leading inline flag applies to its own rule only
+        flagged_rules = {**rules, 'no_eval': {'pattern': r'(?i)EVAL\s*\(', 'description': 'No eval'}}
+        found = sorted((r.line_number, r.metadata['rule_name']) for r in analyzer._apply_rules(file_path, flagged_rules))
+        self.assertEqual(found, [(2, 'no_eval'), (3, 'no_shell')])
+
+        # Rules whose required literals are absent are skipped outright
+        prefiltered = {'no_shell': {'pattern': r'os\.system\(', 'literals': ['subprocess']}}
+        self.assertEqual(analyzer._apply_rules(file_path, prefiltered), [])
+
     def test_style_analysis(self):
         """Test style analysis functionality"""
         # Create test file with style issues
@@ -106,6 +206,43 @@ def badFunction():
             any(r.analysis_type == AnalysisType.DEP_CHECK for r in results)
         )
 
+    def test_dependency_analysis_calls_safety(self):
+        import sys
+        import types
+        from unittest import mock
+
+        req_file = Path(self.temp_dir) / "requirements.txt"
+        req_file.write_text("requests==2.20.0\n")
+        package = types.SimpleNamespace(name="requests", version="2.20.0")
+        vuln = types.SimpleNamespace(
+            package_name="requests", analyzed_version="2.20.0",
+            vulnerability_id="12345", vulnerable_spec="<2.20.1",
+            advisory="Leaks credentials"
+        )
+
+        safety_module = types.ModuleType("safety.safety")
+        safety_module.check = mock.Mock(return_value=([vuln], False))
+        util_module = types.ModuleType("safety.util")
+        util_module.read_requirements = mock.Mock(return_value=iter([package]))
+        package_module = types.ModuleType("safety")
+        package_module.safety = safety_module
+        package_module.util = util_module
+        modules = {"safety": package_module, "safety.safety": safety_module,
+                   "safety.util": util_module}
+
+        with mock.patch.dict(sys.modules, modules), \
+                mock.patch.dict("os.environ", {"SAFETY_API_KEY": "key-123"}):
+            results = DependencyAnalyzer().analyze_requirements(str(req_file))
+
+        kwargs = safety_module.check.call_args.kwargs
+        self.assertEqual(kwargs["packages"], [package])
+        self.assertEqual(kwargs["key"], "key-123")
+        self.assertIs(kwargs["db_mirror"], False)
+        self.assertGreater(kwargs["cached"], 0)
+        (result,) = results
+        self.assertEqual(result.metadata["vuln_id"], "12345")
+        self.assertIn("requests==2.20.0", result.message)
+
     def test_full_project_analysis(self):
         # Create a small project structure
         project_dir = Path(self.temp_dir) / "test_project"
@@ -137,6 +274,91 @@ def badFunction():
         self.assertIn('CRITICAL', summary['by_severity'])
         self.assertIn('PATTERN_MATCH', summary['by_type'])
 
+    def test_parallel_project_analysis(self):
+        project_dir = Path(self.temp_dir) / "parallel_project"
+        project_dir.mkdir()
+        (project_dir / "first.py").write_text('password = "one"\n')
+        (project_dir / "second.py").write_text('token = "two"\n')
+
+        results = self.engine.analyze_project(str(project_dir), max_workers=2)
+
+        # Findings from every file are kept, not just the last one analyzed
+        secret_files = {
+            Path(r.file_path).name for r in results
+            if r.metadata and r.metadata.get('pattern_name') == 'hardcoded_secrets'
+        }
+        self.assertEqual(secret_files, {"first.py", "second.py"})
+
+    def test_cached_analysis(self):
+        cache_dir = Path(self.temp_dir) / "cache"
+        file_path = self.create_test_file('password = "one"\n')
+        analyzed = []
+
+        def counting_engine():
+            # memo_size=0 so only the on-disk cache can serve repeat runs
+            engine = StaticAnalysisEngine(cache_dir=str(cache_dir), memo_size=0)
+            run_analyzers = engine._run_analyzers
+
+            def counting_run(file_paths, *args):
+                analyzed.extend(file_paths)
+                return run_analyzers(file_paths, *args)
+
+            engine._run_analyzers = counting_run
+            return engine
+
+        first = counting_engine().analyze_file(file_path)
+        self.assertTrue((cache_dir / "results.sqlite").exists())
+
+        # Unchanged files are served from the cache, even by a new engine
+        self.assertEqual(counting_engine().analyze_file(file_path), first)
+        self.assertEqual(analyzed, [file_path])
+
+        # Editing the file invalidates its entry
+        self.create_test_file('password = "one"\ntoken = "two"\n')
+        second = counting_engine().analyze_file(file_path)
+        self.assertGreater(len(second), len(first))
+        self.assertEqual(analyzed, [file_path, file_path])
+
+        # Entries are plain JSON; an unreadable one is a miss, never loaded
+        import json
+        import sqlite3
+        with sqlite3.connect(str(cache_dir / "results.sqlite")) as db:
+            for (payload,) in db.execute("SELECT results FROM cache"):
+                json.loads(payload)
+            db.execute("UPDATE cache SET results = ?", (b"\x80\x04not json",))
+        self.assertEqual(counting_engine().analyze_file(file_path), second)
+        self.assertEqual(analyzed, [file_path] * 3)
+
+    def test_repeated_analysis_is_memoized(self):
+        file_path = self.create_test_file('password = "one"\n')
+        analyzed = []
+        run_analyzers = self.engine._run_analyzers
+
+        def counting_run(file_paths, *args):
+            analyzed.extend(file_paths)
+            return run_analyzers(file_paths, *args)
+
+        self.engine._run_analyzers = counting_run
+        first = self.engine.analyze_file(file_path)
+        self.assertEqual(self.engine.analyze_file(file_path), first)
+        self.assertEqual(analyzed, [file_path])
+
+    def test_duplicate_findings_are_dropped(self):
+        from src.analyzers.static import _unique_results
+
+        # Both secrets hit the same pattern on the same line, and both survive
+        file_path = self.create_test_file('password = "one"; secret = "two"\n')
+        results = self.engine.analyze_file(file_path)
+
+        secrets = [
+            r for r in results
+            if r.metadata and r.metadata.get('pattern_name') == 'hardcoded_secrets'
+        ]
+        self.assertEqual([r.metadata['column'] for r in secrets], [0, 18])
+
+        # Only exact repeats of a finding are dropped
+        self.assertEqual(_unique_results(secrets + secrets), secrets)
+
     def test_critical_issues_filtering(self):
         code = """
         password = "super_secret"